@@ -0,0 +1,110 @@
+import argparse
+import csv
+import sys
+import time
+
+from generate import generate
+from logic import *
+
+
+class Counted(Sentence):
+    """Sentence wrapper that counts how many models it is evaluated in."""
+
+    def __init__(self, sentence):
+        Sentence.validate(sentence)
+        self.sentence = sentence
+        self.count = 0
+
+    def evaluate(self, model):
+        self.count += 1
+        return self.sentence.evaluate(model)
+
+    def formula(self):
+        return self.sentence.formula()
+
+    def symbols(self):
+        return self.sentence.symbols()
+
+
+def check_each(knowledge, queries):
+    """Runs model_check once per query."""
+    counted = Counted(simplify(knowledge))
+    answers = [model_check(counted, query) for query in queries]
+    return answers, counted.count
+
+
+def check_each_parallel(knowledge, queries):
+    """Runs model_check_parallel once per query."""
+    answers = [model_check_parallel(knowledge, query) for query in queries]
+    return answers, None
+
+
+def check_knowledge_base(knowledge, queries):
+    """Builds one KnowledgeBase and asks it every query."""
+    counted = Counted(simplify(knowledge))
+    knowledge_base = KnowledgeBase(counted)
+    answers = [knowledge_base.entails(query) for query in queries]
+    return answers, counted.count
+
+
+BACKENDS = {
+    "model_check": check_each,
+    "model_check_parallel": check_each_parallel,
+    "KnowledgeBase": check_knowledge_base,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Time each model checking backend on random puzzles."
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=[2, 3, 4, 5],
+                        help="numbers of inhabitants to generate puzzles for")
+    parser.add_argument("--statements", type=int, default=2,
+                        help="statements per inhabitant")
+    parser.add_argument("--backends", nargs="+", choices=list(BACKENDS),
+                        default=list(BACKENDS))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--csv", help="also write results to this CSV file")
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        names, symbols, said, knowledge = generate(
+            size, size * args.statements, seed=args.seed + size
+        )
+        queries = [symbol for name in names for symbol in symbols[name]]
+        expected = None
+        for backend in args.backends:
+            start = time.perf_counter()
+            answers, visited = BACKENDS[backend](knowledge, queries)
+            elapsed = time.perf_counter() - start
+
+            # Every backend must agree with the first one
+            if expected is None:
+                expected = answers
+            elif answers != expected:
+                sys.exit(f"{backend} disagrees on puzzle of size {size}")
+
+            results.append({
+                "inhabitants": size,
+                "statements": len(said),
+                "backend": backend,
+                "symbols": len(knowledge.symbols()),
+                "models visited": visited,
+                "seconds": elapsed,
+            })
+            print(f"{size:>4} inhabitants  {backend:<22}"
+                  f"{len(knowledge.symbols()):>4} symbols  "
+                  f"{visited if visited is not None else '-':>10} models  "
+                  f"{elapsed:10.4f} s")
+
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(results[0]))
+            writer.writeheader()
+            writer.writerows(results)
+
+
+if __name__ == "__main__":
+    main()
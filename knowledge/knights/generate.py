@@ -0,0 +1,121 @@
+import random
+import string
+import sys
+
+from logic import *
+
+
+def inhabitant_names(n):
+    """Returns names for `n` inhabitants: A, B, ..., Z, then A1, B1, ..."""
+    letters = string.ascii_uppercase
+    return [
+        letters[i % 26] + (str(i // 26) if i >= 26 else "")
+        for i in range(n)
+    ]
+
+
+def generate(inhabitants, statements, seed=None):
+    """
+    Generates a random knights and knaves puzzle.
+
+    Returns a tuple (names, symbols, said, knowledge), where `symbols`
+    maps each name to its (knight, knave) symbols, `said` is a list of
+    (speaker, text) pairs and `knowledge` is the puzzle's knowledge base.
+    Statements are chosen to agree with a hidden assignment of kinds, so
+    every generated puzzle has at least one solution.
+    """
+    rng = random.Random(seed)
+    names = inhabitant_names(inhabitants)
+    symbols = {
+        name: (Symbol(f"{name} is a Knight"), Symbol(f"{name} is a Knave"))
+        for name in names
+    }
+
+    # Each inhabitant is either a knight or a knave, but not both
+    knowledge = And()
+    for knight, knave in symbols.values():
+        knowledge.add(Or(knight, knave))
+        knowledge.add(Not(And(knight, knave)))
+
+    hidden = {name: rng.random() < 0.5 for name in names}
+    said = []
+    while len(said) < statements:
+        text, claim = random_claim(rng, names, symbols)
+
+        # Knights only say true things and knaves only false ones
+        truth = claim.evaluate({
+            symbol.name: hidden[name] == (kind == 0)
+            for name in names
+            for kind, symbol in enumerate(symbols[name])
+        })
+        speakers = [name for name in names if hidden[name] == truth]
+        if not speakers:
+            continue
+        speaker = rng.choice(speakers)
+
+        knight, knave = symbols[speaker]
+        said.append((speaker, text))
+        knowledge.add(Implication(knight, claim))
+        knowledge.add(Implication(knave, Not(claim)))
+
+    return names, symbols, said, knowledge
+
+
+def random_claim(rng, names, symbols):
+    """Returns the text and sentence of a random claim about inhabitants."""
+    y = rng.choice(names)
+    z = rng.choice([name for name in names if name != y] or names)
+    (y_knight, y_knave), (z_knight, z_knave) = symbols[y], symbols[z]
+    claims = [
+        (f"{y} is a knight.", y_knight),
+        (f"{y} is a knave.", y_knave),
+        (f"{y} and {z} are the same kind.",
+         Or(And(y_knight, z_knight), And(y_knave, z_knave))),
+        (f"{y} and {z} are of different kinds.",
+         Or(And(y_knight, z_knave), And(y_knave, z_knight))),
+        (f"{y} and {z} are both knaves.", And(y_knave, z_knave)),
+        (f"{y} or {z} is a knight.", Or(y_knight, z_knight)),
+    ]
+    return rng.choice(claims)
+
+
+def source(names, symbols, said, knowledge):
+    """Returns Python source for a puzzle, in the style of puzzle.py."""
+    variables = dict()
+    lines = ["from logic import *", ""]
+    for name in names:
+        for symbol, kind in zip(symbols[name], ("Knight", "Knave")):
+            variables[symbol] = f"{name}{kind}"
+            lines.append(f"{name}{kind} = Symbol(\"{symbol.name}\")")
+        lines.append("")
+
+    for speaker, text in said:
+        lines.append(f"# {speaker} says \"{text}\"")
+    lines.append("knowledge = And(")
+    lines.append(",\n".join(
+        "    " + expression(conjunct, variables)
+        for conjunct in knowledge.conjuncts
+    ))
+    lines.append(")")
+    return "\n".join(lines) + "\n"
+
+
+def expression(sentence, variables):
+    """Returns a Python expression that constructs a sentence."""
+    if isinstance(sentence, Symbol):
+        return variables[sentence]
+    arguments = ", ".join(
+        expression(operand, variables) for operand in operands(sentence)
+    )
+    return f"{type(sentence).__name__}({arguments})"
+
+
+def main():
+    if len(sys.argv) not in [3, 4]:
+        sys.exit("Usage: python generate.py inhabitants statements [seed]")
+    seed = int(sys.argv[3]) if len(sys.argv) == 4 else None
+    print(source(*generate(int(sys.argv[1]), int(sys.argv[2]), seed)), end="")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,8 @@
+import functools
 import itertools
+import multiprocessing
+import os
+import re
 
 
 class Sentence():
@@ -87,7 +91,7 @@ class Not(Sentence):
         return not self.operand.evaluate(model)
 
     def formula(self):
-        return "¬" + Sentence.parenthesize(self.operand.formula())
+        return render(self)
 
     def symbols(self):
         return self.operand.symbols()
@@ -121,13 +125,12 @@ class And(Sentence):
         return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
 
     def formula(self):
-        if len(self.conjuncts) == 1:
-            return self.conjuncts[0].formula()
-        return " ∧ ".join([Sentence.parenthesize(conjunct.formula())
-                           for conjunct in self.conjuncts])
+        return render(self)
 
     def symbols(self):
-        return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
+        return set().union(
+            *[conjunct.symbols() for conjunct in self.conjuncts]
+        )
 
 
 class Or(Sentence):
@@ -152,13 +155,12 @@ class Or(Sentence):
         return any(disjunct.evaluate(model) for disjunct in self.disjuncts)
 
     def formula(self):
-        if len(self.disjuncts) == 1:
-            return self.disjuncts[0].formula()
-        return " ∨  ".join([Sentence.parenthesize(disjunct.formula())
-                            for disjunct in self.disjuncts])
+        return render(self)
 
     def symbols(self):
-        return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
+        return set().union(
+            *[disjunct.symbols() for disjunct in self.disjuncts]
+        )
 
 
 class Implication(Sentence):
@@ -184,9 +186,7 @@ class Implication(Sentence):
                 or self.consequent.evaluate(model))
 
     def formula(self):
-        antecedent = Sentence.parenthesize(self.antecedent.formula())
-        consequent = Sentence.parenthesize(self.consequent.formula())
-        return f"{antecedent} => {consequent}"
+        return render(self)
 
     def symbols(self):
         return set.union(self.antecedent.symbols(), self.consequent.symbols())
@@ -217,47 +217,608 @@ class Biconditional(Sentence):
                     and not self.right.evaluate(model)))
 
     def formula(self):
-        left = Sentence.parenthesize(str(self.left))
-        right = Sentence.parenthesize(str(self.right))
-        return f"{left} <=> {right}"
+        return render(self)
 
     def symbols(self):
         return set.union(self.left.symbols(), self.right.symbols())
 
 
-def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
-
-    def check_all(knowledge, query, symbols, model):
-        """Checks if knowledge base entails query, given a particular model."""
-
-        # If model has an assignment for each symbol
-        if not symbols:
-
-            # If knowledge base is true in model, then query must also be true
-            if knowledge.evaluate(model):
-                return query.evaluate(model)
+PRECEDENCE = {
+    Biconditional: 1, Implication: 2, Or: 3, And: 4, Not: 5, Symbol: 6
+}
+OPERATORS = {
+    Biconditional: " <=> ", Implication: " => ", Or: " ∨ ", And: " ∧ "
+}
+
+# Empty conjunctions and disjunctions are written as constants
+CONSTANTS = {And: "⊤", Or: "⊥"}
+
+
+def render(sentence, file=None):
+    """
+    Renders the formula of a sentence in a single pass over its parts,
+    parenthesizing an operand only when its operator binds no tighter
+    than the enclosing one. An empty `And` is written as ⊤ (true) and
+    an empty `Or` as ⊥ (false). If `file` is given, the formula is
+    written to it in chunks as it is built and None is returned.
+    """
+    pieces = []
+    stack = [sentence]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            pieces.append(item)
+            if file is not None and len(pieces) >= 4096:
+                file.write("".join(pieces))
+                pieces.clear()
+            continue
+
+        # A single conjunct or disjunct is rendered on its own
+        item = unwrap(item)
+        precedence = PRECEDENCE.get(type(item), 0)
+
+        if isinstance(item, Symbol):
+            pieces.append(item.name)
+        elif constant(item):
+            pieces.append(constant(item))
+        elif isinstance(item, Not):
+            pieces.append("¬")
+            operand = unwrap(item.operand)
+            if binding(operand) < precedence:
+                stack.extend((")", operand, "("))
+            else:
+                stack.append(operand)
+        elif type(item) in OPERATORS:
+
+            # Push operands in reverse, so they are popped in order
+            for i, operand in enumerate(reversed(operands(item))):
+                if i:
+                    stack.append(OPERATORS[type(item)])
+                operand = unwrap(operand)
+                if binding(operand) <= precedence:
+                    stack.extend((")", operand, "("))
+                else:
+                    stack.append(operand)
+        else:
+            pieces.append(item.formula())
+
+    if file is None:
+        return "".join(pieces)
+    file.write("".join(pieces))
+
+
+def binding(sentence):
+    """
+    Returns how tightly a sentence binds as an operand. Symbol names
+    that are not a single word are parenthesized like compound sentences.
+    """
+    if isinstance(sentence, Symbol) and not sentence.name.isalpha():
+        return 0
+    if constant(sentence):
+        return PRECEDENCE[Symbol]
+    return PRECEDENCE.get(type(sentence), 0)
+
+
+def constant(sentence):
+    """Returns the constant an empty `And` or `Or` is written as, if any."""
+    if isinstance(sentence, (And, Or)) and not operands(sentence):
+        return CONSTANTS[And if isinstance(sentence, And) else Or]
+    return None
+
+
+def operands(sentence):
+    """Returns the operands of a sentence, in order."""
+    if isinstance(sentence, And):
+        return sentence.conjuncts
+    elif isinstance(sentence, Or):
+        return sentence.disjuncts
+    elif isinstance(sentence, Implication):
+        return [sentence.antecedent, sentence.consequent]
+    elif isinstance(sentence, Biconditional):
+        return [sentence.left, sentence.right]
+    elif isinstance(sentence, Not):
+        return [sentence.operand]
+    return []
+
+
+def unwrap(sentence):
+    """Returns the sentence a single-operand `And` or `Or` stands for."""
+    while isinstance(sentence, (And, Or)) and len(operands(sentence)) == 1:
+        sentence = operands(sentence)[0]
+    return sentence
+
+
+def simplify(sentence):
+    """
+    Returns a logically equivalent sentence with nested `And`s and `Or`s
+    flattened, duplicate operands removed, constants folded and unit
+    facts propagated. A sentence that is always true is returned as
+    `And()`, and one that is always false as `Or()`.
+    """
+    Sentence.validate(sentence)
+    facts = dict()
+    result = simplify_given(sentence, facts)
+
+    # Propagate unit facts until no new ones appear
+    while isinstance(result, Sentence):
+        units = literals(result)
+        if units is None and isinstance(result, And):
+            units = dict()
+            for conjunct in result.conjuncts:
+                units.update(literals(conjunct) or dict())
+        if not units:
+            break
+        facts.update(units)
+        result = simplify_given(result, facts)
+
+    # Put the propagated facts back in front of what remains
+    if result is False:
+        return Or()
+    conjuncts = [Symbol(name) if value else Not(Symbol(name))
+                 for name, value in facts.items()]
+    if result is not True:
+        conjuncts.append(result)
+    if len(conjuncts) == 1:
+        return conjuncts[0]
+    return simplify_given(And(*conjuncts), dict()) if conjuncts else And()
+
+
+def simplify_given(sentence, facts):
+    """
+    Simplifies a sentence given known symbol values in `facts`.
+    Returns True or False if the sentence is constant, otherwise
+    the simplified sentence.
+    """
+    if isinstance(sentence, Symbol):
+        return facts.get(sentence.name, sentence)
+
+    elif isinstance(sentence, Not):
+        operand = simplify_given(sentence.operand, facts)
+        if isinstance(operand, bool):
+            return not operand
+        return negate(operand)
+
+    elif isinstance(sentence, (And, Or)):
+        conjunction = isinstance(sentence, And)
+        operands = sentence.conjuncts if conjunction else sentence.disjuncts
+
+        # Flatten nested operators of the same kind, dropping neutral
+        # constants and stopping early on an absorbing constant
+        flattened = dict()
+        for operand in operands:
+            operand = simplify_given(operand, facts)
+            if operand is (not conjunction):
+                return not conjunction
+            elif operand is conjunction:
+                continue
+            elif type(operand) is type(sentence):
+                nested = (operand.conjuncts if conjunction
+                          else operand.disjuncts)
+                flattened.update(dict.fromkeys(nested))
+            else:
+                flattened[operand] = None
+
+        # A sentence together with its negation is also absorbing
+        if any(negate(operand) in flattened for operand in flattened):
+            return not conjunction
+        if not flattened:
+            return conjunction
+        if len(flattened) == 1:
+            return next(iter(flattened))
+        return type(sentence)(*flattened)
+
+    elif isinstance(sentence, Implication):
+        antecedent = simplify_given(sentence.antecedent, facts)
+        if antecedent is False:
             return True
+        elif antecedent is True:
+            return simplify_given(sentence.consequent, facts)
+
+        # The consequent only matters when the antecedent holds
+        assumed = literals(antecedent)
+        if assumed is not None:
+            consequent = simplify_given(
+                sentence.consequent, {**facts, **assumed}
+            )
         else:
+            consequent = simplify_given(sentence.consequent, facts)
+        if consequent is True or consequent == antecedent:
+            return True
+        elif consequent is False:
+            return negate(antecedent)
+        return Implication(antecedent, consequent)
+
+    elif isinstance(sentence, Biconditional):
+        left = simplify_given(sentence.left, facts)
+        right = simplify_given(sentence.right, facts)
+        if isinstance(left, bool) and isinstance(right, bool):
+            return left == right
+        elif isinstance(left, bool):
+            return right if left else negate(right)
+        elif isinstance(right, bool):
+            return left if right else negate(left)
+        elif left == right:
+            return True
+        elif left == negate(right):
+            return False
+        return Biconditional(left, right)
+
+    # Leave other kinds of sentences as they are
+    Sentence.validate(sentence)
+    return sentence
+
+
+def negate(sentence):
+    """Returns the negation of a sentence, removing double negation."""
+    if isinstance(sentence, Not):
+        return sentence.operand
+    return Not(sentence)
+
+
+def literals(sentence):
+    """
+    Returns a dictionary of the symbol values asserted by a literal or a
+    conjunction of literals, or None for any other sentence.
+    """
+    if isinstance(sentence, Symbol):
+        return {sentence.name: True}
+    elif isinstance(sentence, Not) and isinstance(sentence.operand, Symbol):
+        return {sentence.operand.name: False}
+    elif isinstance(sentence, And):
+        values = dict()
+        for conjunct in sentence.conjuncts:
+            value = literals(conjunct)
+            if value is None or isinstance(conjunct, And):
+                return None
+            values.update(value)
+        return values
+    return None
+
+
+def check_all(knowledge, query, symbols, model):
+    """Checks if knowledge base entails query, given a particular model."""
+
+    # If model has an assignment for each symbol
+    if not symbols:
+
+        # If knowledge base is true in model, then query must also be true
+        if knowledge.evaluate(model):
+            return query.evaluate(model)
+        return True
+    else:
+
+        # Choose one of the remaining unused symbols
+        remaining = symbols.copy()
+        p = remaining.pop()
+
+        # Create a model where the symbol is true
+        model_true = model.copy()
+        model_true[p] = True
+
+        # Create a model where the symbol is false
+        model_false = model.copy()
+        model_false[p] = False
+
+        # Ensure entailment holds in both models
+        return (check_all(knowledge, query, remaining, model_true) and
+                check_all(knowledge, query, remaining, model_false))
 
-            # Choose one of the remaining unused symbols
-            remaining = symbols.copy()
-            p = remaining.pop()
-
-            # Create a model where the symbol is true
-            model_true = model.copy()
-            model_true[p] = True
 
-            # Create a model where the symbol is false
-            model_false = model.copy()
-            model_false[p] = False
+def model_check(knowledge, query):
+    """Checks if knowledge base entails query."""
 
-            # Ensure entailment holds in both models
-            return (check_all(knowledge, query, remaining, model_true) and
-                    check_all(knowledge, query, remaining, model_false))
+    # Remove redundant structure before enumerating models
+    knowledge = simplify(knowledge)
 
     # Get all symbols in both knowledge and query
     symbols = set.union(knowledge.symbols(), query.symbols())
 
     # Check that knowledge entails query
     return check_all(knowledge, query, symbols, dict())
+
+
+def model_check_parallel(knowledge, query, split=None, processes=None):
+    """
+    Checks if knowledge base entails query, splitting the models across
+    a pool of processes.
+
+    The first `split` symbols are fixed to each of their 2^split
+    assignments, and every partial model is checked by a worker. The
+    pool is terminated as soon as any worker finds a counter-model.
+    """
+
+    # Remove redundant structure before enumerating models
+    knowledge = simplify(knowledge)
+
+    # Get all symbols in both knowledge and query, in a fixed order
+    symbols = sorted(set.union(knowledge.symbols(), query.symbols()))
+
+    # By default, make a few partial models per available core
+    if split is None:
+        split = (processes or os.cpu_count() or 1).bit_length() + 1
+    split = min(split, len(symbols))
+    if split == 0:
+        return model_check(knowledge, query)
+
+    # Fix the first symbols, leaving the rest to be enumerated by workers
+    fixed, remaining = symbols[:split], set(symbols[split:])
+    models = (
+        dict(zip(fixed, values))
+        for values in itertools.product((True, False), repeat=split)
+    )
+
+    # Stop at the first counter-model; leaving the pool terminates workers
+    with multiprocessing.Pool(processes) as pool:
+        return all(pool.imap_unordered(
+            functools.partial(check_all, knowledge, query, remaining),
+            models
+        ))
+
+
+class KnowledgeBase():
+    """
+    Knowledge base that enumerates its satisfying models once, so that
+    many entailment queries can be answered without re-checking every
+    model of the knowledge from scratch.
+    """
+
+    def __init__(self, *sentences):
+        self.sentences = []
+        self.symbols = set()
+
+        # With no knowledge, the empty model is the only model
+        self.models = [dict()]
+        for sentence in sentences:
+            self.add(sentence)
+
+    def add(self, sentence):
+        """
+        Adds a sentence to the knowledge base, keeping only the models
+        that are consistent with it.
+        """
+        Sentence.validate(sentence)
+        self.sentences.append(sentence)
+        sentence = simplify(sentence)
+
+        # Extend models over any new symbols, then filter them
+        self.models = [
+            model for model in KnowledgeBase.extend(
+                self.models, sentence.symbols() - self.symbols
+            )
+            if sentence.evaluate(model)
+        ]
+        self.symbols |= sentence.symbols()
+
+    def entails(self, query):
+        """Checks if knowledge base entails query."""
+        Sentence.validate(query)
+        return all(
+            query.evaluate(model) for model in KnowledgeBase.extend(
+                self.models, query.symbols() - self.symbols
+            )
+        )
+
+    def satisfiable(self):
+        """Checks if there is any model of the knowledge base."""
+        return len(self.models) > 0
+
+    @classmethod
+    def extend(cls, models, symbols):
+        """
+        Yields every model that extends one of `models` with an assignment
+        to each of `symbols`.
+        """
+        symbols = sorted(symbols)
+        if not symbols:
+            yield from models
+            return
+        for model in models:
+            for values in itertools.product((True, False), repeat=len(symbols)):
+                extended = model.copy()
+                extended.update(zip(symbols, values))
+                yield extended
+
+
+TOKENS = re.compile(r"(<=>|=>|[¬∧∨()⊤⊥])")
+BUILDERS = {operator.strip(): kind for kind, operator in OPERATORS.items()}
+LITERAL = re.compile(
+    r"\s*[(\s]*((?:¬[(\s]*)*)([^¬∧∨()<=>⊤⊥]+?)[)\s]*"
+)
+
+
+def tokenize(formula):
+    """Splits a formula into operator, parenthesis and symbol name tokens."""
+    for token in TOKENS.split(formula):
+        token = token.strip()
+        if token:
+            yield token
+
+
+def parse(formula, symbols=None):
+    """
+    Parses a formula in the syntax produced by `Sentence.formula()`.
+
+    Operators bind, from tightest to loosest: ¬, ∧, ∨, => and <=>.
+    Implication groups to the right. If `symbols` is given, it is used
+    as a cache of `Symbol` objects by name, so that sentences parsed
+    with the same cache share their symbols. Raises ValueError if the
+    formula is malformed.
+
+    Operators are kept on a stack rather than parsed recursively, so
+    formulas can be nested as deeply as `render` can write them.
+    """
+    if symbols is None:
+        symbols = dict()
+
+    # Operators waiting for their right operand, as [token, count] pairs
+    # where count is the number of operands of an ∧ or ∨ chain so far,
+    # and "(" entries marking open parentheses
+    operators = []
+    sentences = []
+
+    precedence = {token: PRECEDENCE[kind] for token, kind in BUILDERS.items()}
+    precedence["¬"] = PRECEDENCE[Not]
+
+    def reduce():
+        token, count = operators.pop()
+        if token == "¬":
+            sentences.append(Not(sentences.pop()))
+            return
+        operands = sentences[-count:]
+        del sentences[-count:]
+        sentences.append(BUILDERS[token](*operands))
+
+    expect_operand = True
+    for token in tokenize(formula):
+        if expect_operand:
+            if token in ("¬", "("):
+                operators.append([token, 1])
+            elif token in BUILDERS or token == ")":
+                raise ValueError(f"expected a symbol in formula: {formula}")
+            elif token in ("⊤", "⊥"):
+                sentences.append(And() if token == "⊤" else Or())
+                expect_operand = False
+            else:
+                if token not in symbols:
+                    symbols[token] = Symbol(token)
+                sentences.append(symbols[token])
+                expect_operand = False
+        elif token == ")":
+            while operators and operators[-1][0] != "(":
+                reduce()
+            if not operators:
+                raise ValueError(f"unexpected ')' in formula: {formula}")
+            operators.pop()
+        elif token in BUILDERS:
+
+            # Finish operators that bind tighter, or as tightly for the
+            # left-grouping <=>; implication groups to the right
+            while operators and operators[-1][0] != "(" and (
+                precedence[operators[-1][0]] > precedence[token]
+                or operators[-1][0] == token == "<=>"
+            ):
+                reduce()
+            # Further operands of an ∧ or ∨ chain join the same sentence
+            if operators and operators[-1][0] == token in ("∧", "∨"):
+                operators[-1][1] += 1
+            else:
+                operators.append([token, 2])
+            expect_operand = True
+        else:
+            raise ValueError(f"unexpected {token!r} in formula: {formula}")
+
+    if expect_operand:
+        raise ValueError(f"expected a symbol in formula: {formula}")
+    while operators:
+        if operators[-1][0] == "(":
+            raise ValueError(f"expected ')' in formula: {formula}")
+        reduce()
+    return sentences[0]
+
+
+def load(lines, symbols=None):
+    """
+    Yields a sentence for each formula in an iterable of lines, such as
+    an open file. Blank lines and lines starting with # are skipped.
+    """
+    if symbols is None:
+        symbols = dict()
+    for line in lines:
+        line = line.strip()
+        if line and not line.startswith("#"):
+            yield parse(line, symbols)
+
+
+def load_clauses(lines, symbols=None):
+    """
+    Yields the CNF clauses of each formula in an iterable of lines.
+
+    Each clause is a tuple of nonzero integers, where i stands for the
+    i-th symbol and -i for its negation. `symbols` maps symbol names to
+    their numbers and is extended as new names are seen. Lines that are
+    already disjunctions of literals are converted without building any
+    `Sentence` objects.
+    """
+    if symbols is None:
+        symbols = dict()
+
+    def number(name):
+        if name not in symbols:
+            symbols[name] = len(symbols) + 1
+        return symbols[name]
+
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+
+        # Fast path: a disjunction of (possibly parenthesized) literals
+        clause = []
+        if "∧" not in line and "=>" not in line:
+            for part in line.split("∨"):
+                match = LITERAL.fullmatch(part)
+                if match is None or part.count("(") != part.count(")"):
+                    break
+                literal = number(match.group(2).strip())
+                clause.append(
+                    -literal if match.group(1).count("¬") % 2 else literal
+                )
+            else:
+                # Like cnf, drop clauses that contain a literal and its
+                # negation, since they are always true
+                clause = tuple(dict.fromkeys(clause))
+                if not any(-literal in clause for literal in clause):
+                    yield clause
+                continue
+
+        # Otherwise, parse the formula and convert it to CNF
+        for clause in cnf(parse(line)):
+            yield tuple(number(name) if value else -number(name)
+                        for name, value in clause)
+
+
+def cnf(sentence, positive=True):
+    """
+    Returns the clauses of a sentence (or of its negation, if `positive`
+    is False) in conjunctive normal form. Each clause is a frozenset of
+    (name, value) literals; tautological clauses are dropped.
+    """
+    if isinstance(sentence, Symbol):
+        return [frozenset({(sentence.name, positive)})]
+    elif isinstance(sentence, Not):
+        return cnf(sentence.operand, not positive)
+
+    # Rewrite each operator as a conjunction or disjunction of parts
+    elif isinstance(sentence, And):
+        parts = [(conjunct, positive) for conjunct in sentence.conjuncts]
+        conjunction = positive
+    elif isinstance(sentence, Or):
+        parts = [(disjunct, positive) for disjunct in sentence.disjuncts]
+        conjunction = not positive
+    elif isinstance(sentence, Implication):
+        parts = [(sentence.antecedent, not positive),
+                 (sentence.consequent, positive)]
+        conjunction = not positive
+    elif isinstance(sentence, Biconditional):
+        left, right = sentence.left, sentence.right
+        return (cnf(Or(Not(left), right), positive) +
+                cnf(Or(left, Not(right)), positive)
+                if positive else
+                cnf(Or(left, right)) + cnf(Or(Not(left), Not(right))))
+    else:
+        raise TypeError("must be a logical sentence")
+
+    if conjunction:
+        return [clause for part in parts for clause in cnf(*part)]
+
+    # Distribute the disjunction over the clauses of each part
+    clauses = [frozenset()]
+    for part in parts:
+        clauses = [
+            clause | other
+            for clause in clauses
+            for other in cnf(*part)
+            if not any((name, not value) in other for name, value in clause)
+        ]
+    return list(dict.fromkeys(clauses))
+
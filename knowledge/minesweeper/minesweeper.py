@@ -1,5 +1,17 @@
+import csv
 import itertools
+import json
+import math
 import random
+import time
+
+from collections import deque
+from operator import add, sub
+
+# Search steps allowed when enumerating the mine configurations of one
+# group of frontier cells, before falling back to sampling them
+ENUMERATION_LIMIT = 100000
+SAMPLES = 200
 
 class Minesweeper():
     """
@@ -83,28 +95,188 @@ class Minesweeper():
         return self.mines_found == self.mines
 
 
+class ArrayMinesweeper(Minesweeper):
+    """
+    Minesweeper game representation backed by flat byte arrays, with
+    neighbor counts computed once for the whole board, for fast play on
+    large boards.
+    """
+
+    def __init__(self, height=8, width=8, mines=8):
+
+        # Set initial width, height, and number of mines
+        self.height = height
+        self.width = width
+
+        # Place every mine at once, in a flat row-major field
+        self.field = bytearray(height * width)
+        positions = random.sample(range(height * width), mines)
+        for position in positions:
+            self.field[position] = 1
+        self.mines = set(divmod(position, width) for position in positions)
+
+        # Count mines in each 3x3 block by summing along rows and then
+        # along columns, and leave out the cell itself
+        sums = [[0] * width]
+        for i in range(height):
+            row = [0, *self.field[i * width:(i + 1) * width], 0]
+            sums.append(list(map(add, map(add, row[:-2], row[1:-1]), row[2:])))
+        sums.append([0] * width)
+        self.counts = bytearray()
+        for i in range(height):
+            block = map(add, map(add, sums[i], sums[i + 1]), sums[i + 2])
+            self.counts.extend(
+                map(sub, block, self.field[i * width:(i + 1) * width])
+            )
+
+        # Keep track of revealed cells
+        self.revealed = bytearray(height * width)
+
+        # At first, player has found no mines
+        self.mines_found = set()
+
+    @property
+    def board(self):
+        return [
+            [bool(x) for x in self.field[i * self.width:(i + 1) * self.width]]
+            for i in range(self.height)
+        ]
+
+    def is_mine(self, cell):
+        i, j = cell
+        return bool(self.field[i * self.width + j])
+
+    def nearby_mines(self, cell):
+        """
+        Returns the number of mines that are
+        within one row and column of a given cell,
+        not including the cell itself.
+        """
+        i, j = cell
+        return self.counts[i * self.width + j]
+
+    def reveal(self, cell):
+        """
+        Reveals a cell that is not a mine and, if no mines are nearby,
+        keeps revealing neighboring cells until reaching cells next to
+        mines. Returns a dictionary from each newly revealed cell to
+        its number of nearby mines.
+        """
+        height, width = self.height, self.width
+        revealed = dict()
+        start = cell[0] * width + cell[1]
+        if self.revealed[start] or self.field[start]:
+            return revealed
+        self.revealed[start] = 1
+        frontier = [start]
+        while frontier:
+            position = frontier.pop()
+            i, j = divmod(position, width)
+            revealed[(i, j)] = self.counts[position]
+            if self.counts[position]:
+                continue
+
+            # No nearby mines, so every neighbor is safe to reveal
+            for di in (-1, 0, 1):
+                for dj in (-1, 0, 1):
+                    ni, nj = i + di, j + dj
+                    if 0 <= ni < height and 0 <= nj < width:
+                        neighbor = ni * width + nj
+                        if not self.revealed[neighbor]:
+                            self.revealed[neighbor] = 1
+                            frontier.append(neighbor)
+        return revealed
+
+
+# Bit assigned to each cell seen so far, and the cell for each bit
+CELL_BITS = dict()
+BIT_CELLS = []
+
+
+def cell_mask(cells):
+    """
+    Returns an integer with the bit of each of `cells` set.
+    """
+    mask = 0
+    for cell in cells:
+        bit = CELL_BITS.get(cell)
+        if bit is None:
+            bit = CELL_BITS[cell] = 1 << len(BIT_CELLS)
+            BIT_CELLS.append(cell)
+        mask |= bit
+    return mask
+
+
+def mask_cells(mask):
+    """
+    Returns the set of cells whose bits are set in `mask`.
+    """
+    cells = set()
+    while mask:
+        bit = mask & -mask
+        cells.add(BIT_CELLS[bit.bit_length() - 1])
+        mask ^= bit
+    return cells
+
+
 class Sentence():
     """
     Logical statement about a Minesweeper game
     A sentence consists of a set of board cells,
     and a count of the number of those cells which are mines.
+
+    The cells are stored as an integer bitmask, so that comparing
+    and combining sentences takes a few integer operations.
     """
 
     def __init__(self, cells, count):
-        self.cells = set(cells)
+        self.mask = cell_mask(cells)
         self.count = count
 
+    @classmethod
+    def from_mask(cls, mask, count):
+        """
+        Creates a sentence directly from a bitmask of cells.
+        """
+        sentence = cls.__new__(cls)
+        sentence.mask = mask
+        sentence.count = count
+        return sentence
+
+    @property
+    def cells(self):
+        return mask_cells(self.mask)
+
+    @cells.setter
+    def cells(self, cells):
+        self.mask = cell_mask(cells)
+
     def __eq__(self, other):
-        return self.cells == other.cells and self.count == other.count
+        return self.mask == other.mask and self.count == other.count
 
     def __str__(self):
         return f"{self.cells} = {self.count}"
 
+    def issubset(self, other):
+        """
+        Checks if every cell in this sentence is in `other`.
+        """
+        return self.mask & ~other.mask == 0
+
+    def difference(self, other):
+        """
+        Returns the sentence for the cells in this sentence but not in
+        `other`, assuming `other` is a subset of this sentence.
+        """
+        return Sentence.from_mask(
+            self.mask & ~other.mask, self.count - other.count
+        )
+
     def known_mines(self):
         """
         Returns the set of all cells in self.cells known to be mines.
         """
-        if len(self.cells) == self.count and self.count != 0:
+        if self.mask.bit_count() == self.count and self.count != 0:
             return self.cells
         return set()
 
@@ -121,17 +293,146 @@ class Sentence():
         Updates internal knowledge representation given the fact that
         a cell is known to be a mine.
         """
-        if (self.cells.__contains__(cell)):
-            self.cells.remove(cell)
+        bit = CELL_BITS.get(cell, 0)
+        if self.mask & bit:
+            self.mask ^= bit
             self.count -= 1
- 
+
     def mark_safe(self, cell):
         """
         Updates internal knowledge representation given the fact that
         a cell is known to be safe.
         """
-        if (self.cells.__contains__(cell)):
-            self.cells.remove(cell)
+        bit = CELL_BITS.get(cell, 0)
+        if self.mask & bit:
+            self.mask ^= bit
+
+
+def search(var_constraints, need, free, record, limit, rng=None):
+    """
+    Backtracking search for assignments of mines (1) and safes (0) to
+    variables, where constraint c needs `need[c]` mines among its `free[c]`
+    variables and `var_constraints[i]` lists the constraints of variable i.
+
+    Calls `record` with each consistent assignment. If `rng` is given,
+    values are tried in random order and the search stops after the
+    first assignment. Returns False if more than `limit` steps were
+    needed, True otherwise.
+    """
+    n = len(var_constraints)
+    need, free = list(need), list(free)
+    current = [None] * n
+    options = [None] * n
+    steps = 0
+
+    def assign(i, value):
+        consistent = True
+        for c in var_constraints[i]:
+            free[c] -= 1
+            need[c] -= value
+            if not 0 <= need[c] <= free[c]:
+                consistent = False
+        if not consistent:
+            unassign(i, value)
+        return consistent
+
+    def unassign(i, value):
+        for c in var_constraints[i]:
+            free[c] += 1
+            need[c] += value
+
+    def values():
+        return rng.sample([0, 1], 2) if rng else [1, 0]
+
+    if n == 0:
+        record([])
+        return True
+
+    depth = 0
+    options[0] = values()
+    while depth >= 0:
+
+        # Undo the value tried last time at this depth, if any
+        if current[depth] is not None:
+            unassign(depth, current[depth])
+            current[depth] = None
+        if not options[depth]:
+            depth -= 1
+            continue
+
+        steps += 1
+        if steps > limit:
+            return False
+        value = options[depth].pop()
+        if not assign(depth, value):
+            continue
+        current[depth] = value
+        if depth == n - 1:
+            record(current)
+            if rng:
+                return True
+            continue
+        depth += 1
+        options[depth] = values()
+    return True
+
+
+def convolve(a, b):
+    """
+    Combines two distributions of mine counts, given as dictionaries
+    from a number of mines to a number of configurations.
+    """
+    result = dict()
+    for i, x in a.items():
+        for j, y in b.items():
+            result[i + j] = result.get(i + j, 0) + x * y
+    return result
+
+
+def eliminate(rows):
+    """
+    Puts a system of linear equations over integers in reduced row
+    echelon form, in place, using fraction-free Gaussian elimination.
+    Each row lists the coefficients followed by the right-hand side.
+    """
+    if not rows:
+        return rows
+    pivot = 0
+    for column in range(len(rows[0]) - 1):
+        for r in range(pivot, len(rows)):
+            if rows[r][column]:
+                rows[pivot], rows[r] = rows[r], rows[pivot]
+                break
+        else:
+            continue
+
+        # Clear the column from every other row
+        top = rows[pivot]
+        for r, row in enumerate(rows):
+            factor = row[column]
+            if r == pivot or not factor:
+                continue
+            row = [x * top[column] - y * factor for x, y in zip(row, top)]
+            divisor = math.gcd(*row)
+            rows[r] = [x // divisor for x in row] if divisor > 1 else row
+        pivot += 1
+        if pivot == len(rows):
+            break
+    return rows
+
+
+def write_trace(records, filename):
+    """
+    Writes a list of trace records (dictionaries with the same keys)
+    to a file, as JSON if the filename ends in .json and as CSV otherwise.
+    """
+    with open(filename, "w", newline="") as f:
+        if filename.endswith(".json"):
+            json.dump(records, f, indent=1)
+        elif records:
+            writer = csv.DictWriter(f, fieldnames=list(records[0]))
+            writer.writeheader()
+            writer.writerows(records)
 
 
 class MinesweeperAI():
@@ -139,12 +440,30 @@ class MinesweeperAI():
     Minesweeper game player
     """
 
-    def __init__(self, height=8, width=8):
+    def __init__(self, height=8, width=8, mines=None, guess="random",
+                 solver="subset", trace=False):
 
         # Set initial height and width
         self.height = height
         self.width = width
 
+        # Total number of mines on the board, if known, and how to pick
+        # a move when no safe move is known: "random" or "probability"
+        self.total_mines = mines
+        self.guess = guess
+
+        # How to draw conclusions: "subset" compares pairs of sentences,
+        # "linear" also solves all sentences as a system of equations
+        self.solver = solver
+
+        # Groups of sentences already solved without any conclusions
+        self.unsolvable = set()
+
+        # Number of sentences inferred from others so far, and if
+        # tracing, a record of each call to add_knowledge
+        self.derived = 0
+        self.trace = [] if trace else None
+
         # Keep track of which cells have been clicked on
         self.moves_made = set()
 
@@ -152,26 +471,76 @@ class MinesweeperAI():
         self.mines = set()
         self.safes = set()
 
-        # List of sentences about the game known to be true
-        self.knowledge = []
+        # Sentences about the game known to be true, by object id,
+        # and by their cells and count to spot duplicates
+        self.sentences = dict()
+        self.keys = dict()
+
+        # Index from each cell to the sentences that contain it
+        self.containing = dict()
+
+        # Safe cells not yet chosen, in the order they were found
+        self.safe_moves = deque()
+
+        # Cells not yet chosen and not known to be mines, as a list for
+        # random choice and a dictionary of their positions in the list
+        self.unknown = [(i, j) for i in range(height) for j in range(width)]
+        self.unknown_index = {cell: i for i, cell in enumerate(self.unknown)}
+
+    @property
+    def knowledge(self):
+        """
+        List of sentences about the game known to be true.
+        """
+        return list(self.sentences.values())
 
     def mark_mine(self, cell):
         """
         Marks a cell as a mine, and updates all knowledge
         to mark that cell as a mine as well.
+        Returns the sentences that contained the cell.
         """
         self.mines.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_mine(cell)
+        self.remove_unknown(cell)
+        return self.update_sentences(cell, Sentence.mark_mine)
 
     def mark_safe(self, cell):
         """
         Marks a cell as safe, and updates all knowledge
         to mark that cell as safe as well.
+        Returns the sentences that contained the cell.
         """
+        if cell not in self.safes and cell not in self.moves_made:
+            self.safe_moves.append(cell)
         self.safes.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_safe(cell)
+        return self.update_sentences(cell, Sentence.mark_safe)
+
+    def remove_unknown(self, cell):
+        """
+        Removes a cell from the unknown cells, by moving the last
+        unknown cell into its place.
+        """
+        i = self.unknown_index.pop(cell, None)
+        if i is None:
+            return
+        last = self.unknown.pop()
+        if last != cell:
+            self.unknown[i] = last
+            self.unknown_index[last] = i
+
+    def update_sentences(self, cell, mark):
+        """
+        Applies `mark` to each sentence that contains `cell`, keeping
+        the knowledge base's indexes up to date.
+        Returns the updated sentences that are still in the knowledge base.
+        """
+        touched = []
+        for sentence in list(self.containing.get(cell, dict()).values()):
+            self.remove_sentence(sentence)
+            mark(sentence, cell)
+            if self.add_sentence(sentence):
+                touched.append(sentence)
+        return touched
 
     def add_knowledge(self, cell, count):
         """
@@ -188,12 +557,18 @@ class MinesweeperAI():
             5) add any new sentences to the AI's knowledge base
                if they can be inferred from existing knowledge
         """
+        if self.trace is not None:
+            start = time.perf_counter()
+            size = len(self.sentences)
+            derived = self.derived
+            resolved = len(self.mines) + len(self.safes)
 
         self.moves_made.add(cell)
-        self.mark_safe(cell)
+        self.remove_unknown(cell)
+        pending = self.mark_safe(cell)
         cells = set()
         known_mines_count = 0
-        
+
         for i in range(cell[0] - 1, cell[0] + 2):
             if i > -1 and i < self.height:
                 for j in range(cell[1] - 1, cell[1] + 2):
@@ -202,27 +577,179 @@ class MinesweeperAI():
                             cells.add((i, j))
                         elif (i, j) in self.mines:
                             known_mines_count += 1
-        
+
         newSentence = Sentence(cells, count - known_mines_count)
+        if self.add_sentence(newSentence):
+            pending.append(newSentence)
+        self.infer(pending)
+        if self.solver == "linear":
+            self.infer_linear()
+
+        if self.trace is not None:
+            self.trace.append({
+                "move": len(self.moves_made),
+                "cell": cell,
+                "count": count,
+                "knowledge before": size,
+                "knowledge after": len(self.sentences),
+                "sentences derived": self.derived - derived,
+                "cells resolved":
+                    len(self.mines) + len(self.safes) - resolved,
+                "seconds": time.perf_counter() - start,
+            })
+
+    def export_trace(self, filename):
+        """
+        Writes the trace of add_knowledge calls to a file, as JSON if
+        the filename ends in .json and as CSV otherwise.
+        """
+        if self.trace is None:
+            raise Exception("tracing is not enabled")
+        write_trace(self.trace, filename)
 
-        self.knowledge.append(newSentence)
-
-        # Mark Mines and Safes
-        for sentence in self.knowledge:
-            if sentence.known_mines():
-                for cell in sentence.known_mines().copy():
-                    self.mark_mine(cell)
-            if sentence.known_safes():
-                for cell in sentence.known_safes().copy():
-                    self.mark_safe(cell)
-        
-        for sentence in self.knowledge:
-            if newSentence != sentence and newSentence.cells.issubset(sentence.cells) and sentence.count > 0 and newSentence.count > 0:            
-                # Remove the cells from sentence
-                newSubset = sentence.cells.difference(newSentence.cells)
-                newSentenceSubset = Sentence(list(newSubset), sentence.count - newSentence.count)
-                self.knowledge.append(newSentenceSubset)
+    def add_sentence(self, sentence):
+        """
+        Adds a sentence to the knowledge base, unless it is empty or
+        already known. Returns whether the sentence was added.
+        """
+        key = (sentence.mask, sentence.count)
+        if not sentence.mask or key in self.keys:
+            return False
+        self.sentences[id(sentence)] = sentence
+        self.keys[key] = sentence
+        for cell in sentence.cells:
+            self.containing.setdefault(cell, dict())[id(sentence)] = sentence
+        return True
+
+    def remove_sentence(self, sentence):
+        """
+        Removes a particular sentence object from the knowledge base.
+        """
+        if not self.contains_sentence(sentence):
+            return
+        del self.sentences[id(sentence)]
+        del self.keys[(sentence.mask, sentence.count)]
+        for cell in sentence.cells:
+            del self.containing[cell][id(sentence)]
+            if not self.containing[cell]:
+                del self.containing[cell]
+
+    def contains_sentence(self, sentence):
+        """
+        Checks if a particular sentence object is in the knowledge base.
+        """
+        return self.sentences.get(id(sentence)) is sentence
+
+    def infer(self, pending):
+        """
+        Draws conclusions from the knowledge base until nothing new
+        can be inferred, starting from the `pending` sentences and
+        re-examining only sentences whose cells have changed.
+        """
+        pending = deque(pending)
+        while pending:
+            sentence = pending.popleft()
+            if not self.contains_sentence(sentence):
+                continue
+
+            # Mark any cells the sentence resolves
+            mines = sentence.known_mines()
+            safes = sentence.known_safes()
+            if mines or safes:
+                self.remove_sentence(sentence)
+                for cell in mines:
+                    pending.extend(self.mark_mine(cell))
+                for cell in safes:
+                    pending.extend(self.mark_safe(cell))
+                continue
+
+            # When one sentence's cells are a subset of another's, the
+            # larger sentence can be replaced by the difference of the two.
+            # Only sentences sharing a cell with this one can be related.
+            related = dict()
+            for cell in sentence.cells:
+                related.update(self.containing[cell])
+            del related[id(sentence)]
+            for other in related.values():
+                if not self.contains_sentence(other):
+                    continue
+                if sentence.mask == other.mask:
+                    continue
+                elif sentence.issubset(other):
+                    subset, superset = sentence, other
+                elif other.issubset(sentence):
+                    subset, superset = other, sentence
+                else:
+                    continue
+                self.remove_sentence(superset)
+                difference = superset.difference(subset)
+                if self.add_sentence(difference):
+                    self.derived += 1
+                    pending.append(difference)
+                if superset is sentence:
+                    break
+
+    def infer_linear(self):
+        """
+        Marks the mines and safes that follow from solving the knowledge
+        base as a linear system, until no more can be found.
+        """
+        while True:
+            mines, safes = self.solve_linear()
+            if not mines and not safes:
+                return
+            pending = []
+            for cell in mines:
+                pending.extend(self.mark_mine(cell))
+            for cell in safes:
+                pending.extend(self.mark_safe(cell))
+            self.infer(pending)
+
+    def solve_linear(self):
+        """
+        Treats each sentence as an equation saying its cells, each 0 or
+        1, add up to its count, and reduces each independent group of
+        equations by Gaussian elimination. A reduced equation whose
+        count can only be reached one way determines all of its cells.
+        Returns a tuple (mines, safes) of the cells determined.
+        """
+        mines, safes = set(), set()
+        for variables in self.frontier_components():
+            index = {cell: i for i, cell in enumerate(variables)}
+            sentences = dict()
+            for cell in variables:
+                sentences.update(self.containing[cell])
+            group = frozenset(
+                (sentence.mask, sentence.count)
+                for sentence in sentences.values()
+            )
+            if group in self.unsolvable:
+                continue
+            rows = []
+            for sentence in sentences.values():
+                row = [0] * (len(variables) + 1)
+                for cell in sentence.cells:
+                    row[index[cell]] = 1
+                row[-1] = sentence.count
+                rows.append(row)
+
+            determined = len(mines) + len(safes)
+            for row in eliminate(rows):
+                *coefficients, total = row
+                lowest = sum(a for a in coefficients if a < 0)
+                highest = sum(a for a in coefficients if a > 0)
+                if total not in (lowest, highest) or lowest == highest:
+                    continue
 
+                # At a bound, every cell must take its extreme value
+                for cell, a in zip(variables, coefficients):
+                    if a and (a > 0) == (total == highest):
+                        mines.add(cell)
+                    elif a:
+                        safes.add(cell)
+            if len(mines) + len(safes) == determined:
+                self.unsolvable.add(group)
+        return mines, safes
 
     def make_safe_move(self):
         """
@@ -234,10 +761,11 @@ class MinesweeperAI():
         and self.moves_made, but should not modify any of those values.
         """
 
-        for safe_cell in self.safes:
-            if safe_cell not in self.moves_made:
-                return safe_cell
-            
+        # Skip over safe cells that have been chosen since they were found
+        while self.safe_moves and self.safe_moves[0] in self.moves_made:
+            self.safe_moves.popleft()
+        if self.safe_moves:
+            return self.safe_moves[0]
         return None
 
 
@@ -247,17 +775,188 @@ class MinesweeperAI():
         Should choose randomly among cells that:
             1) have not already been chosen, and
             2) are not known to be mines
+        In "probability" mode, chooses the cell least likely to be a mine.
         """
-        possible_moves = []
+        if self.guess == "probability":
+            return self.make_probable_move()
 
-        for i in range(self.height):
-            for j in range(self.width):
-                if (i, j) not in self.moves_made and (i, j) not in self.mines:
-                    possible_moves.append((i, j))
-        
-        if len(possible_moves) > 0:
-            return random.choice(possible_moves)
-        else:
+        if self.unknown:
+            return random.choice(self.unknown)
+        return None
+
+    def make_probable_move(self):
+        """
+        Returns the cell that has not already been chosen and is least
+        likely to be a mine, breaking ties at random.
+        """
+        probabilities = self.mine_probabilities()
+        if not probabilities:
             return None
+        lowest = min(probabilities.values())
+        return random.choice([
+            cell for cell, probability in probabilities.items()
+            if probability <= lowest + 1e-12
+        ])
+
+    def mine_probabilities(self):
+        """
+        Returns a dictionary from each cell that has not been chosen and
+        is not known to be a mine, to the probability that it is a mine.
+
+        Cells mentioned in the knowledge base are split into independent
+        groups, and the mine configurations of each group that satisfy
+        every sentence are enumerated (or sampled, for large groups).
+        When the total number of mines is known, configurations are
+        weighted by the number of ways to place the remaining mines in
+        the other cells.
+        """
+        unknown = self.unknown
+        components = [
+            self.frontier_statistics(variables)
+            for variables in self.frontier_components()
+        ]
+        frontier = sum(len(variables) for variables, _, _ in components)
+
+        # Cells known to be safe, but not played yet, cannot hold a mine
+        safes = [cell for cell in unknown if cell in self.safes]
+        rest = len(unknown) - frontier - len(safes)
+
+        # Weight of a frontier configuration with a given number of mines
+        if self.total_mines is None:
+            def weight(k):
+                return 1
+        else:
+            remaining = self.total_mines - len(self.mines)
+
+            def weight(k):
+                if not 0 <= remaining - k <= rest:
+                    return 0
+                return math.comb(rest, remaining - k)
+
+        # Combined distributions of every group before and after each one
+        before = [{0: 1}]
+        for _, totals, _ in components:
+            before.append(convolve(before[-1], totals))
+        after = [{0: 1}]
+        for _, totals, _ in reversed(components):
+            after.append(convolve(after[-1], totals))
+        after.reverse()
+
+        probabilities = dict()
+        for i, (variables, totals, counts) in enumerate(components):
+            if not totals:
+                continue
+            others = convolve(before[i], after[i + 1])
+            factors = {
+                k: sum(ways * weight(k + j) for j, ways in others.items())
+                for k in totals
+            }
+            if self.total_mines is not None and not any(factors.values()):
+                factors = {k: 1 for k in totals}
+            total = sum(totals[k] * factors[k] for k in totals)
+            for v, cell in enumerate(variables):
+                mines = sum(counts[k][v] * factors[k] for k in totals)
+                probabilities[cell] = mines / total
+
+        # Cells outside the frontier share the mines left over
+        if rest:
+            if self.total_mines is not None:
+                everything = before[-1]
+                total = sum(ways * weight(k) for k, ways in everything.items())
+                expected = sum(
+                    ways * weight(k) * (remaining - k)
+                    for k, ways in everything.items()
+                )
+                density = (expected / total / rest if total
+                           else max(remaining, 0) / (rest + frontier))
+            elif frontier:
+                density = sum(
+                    probabilities[cell]
+                    for variables, _, _ in components for cell in variables
+                ) / frontier
+            else:
+                density = 0.5
+            for cell in unknown:
+                if cell not in probabilities and cell not in self.safes:
+                    probabilities[cell] = density
+        for cell in safes:
+            probabilities[cell] = 0
+
+        # Groups whose configurations could not be counted (when every
+        # sample failed) get the average number of mines per cell
+        missing = [cell for cell in unknown if cell not in probabilities]
+        if missing:
+            if self.total_mines is not None:
+                average = min(1, max(remaining, 0) / (rest + frontier))
+            else:
+                average = 0.5
+            for cell in missing:
+                probabilities[cell] = average
+
+        return probabilities
+
+    def frontier_components(self):
+        """
+        Returns the cells mentioned in the knowledge base, split into
+        groups whose sentences do not share any cells.
+        """
+        components = []
+        seen = set()
+        visited = set()
+        for start in self.containing:
+            if start in seen:
+                continue
+            seen.add(start)
+            component = [start]
+            for cell in component:
+                for key, sentence in self.containing[cell].items():
+                    if key in visited:
+                        continue
+                    visited.add(key)
+                    for other in sentence.cells:
+                        if other not in seen:
+                            seen.add(other)
+                            component.append(other)
+            components.append(component)
+        return components
+
+    def frontier_statistics(self, variables):
+        """
+        Counts the mine configurations of a group of frontier cells.
 
+        Returns a tuple (variables, totals, counts), where `totals` maps
+        a number of mines to the number of configurations with that many
+        mines, and `counts[k][i]` is how many of those have a mine in
+        `variables[i]`.
+        """
+        index = {cell: i for i, cell in enumerate(variables)}
+        sentences = dict()
+        for cell in variables:
+            sentences.update(self.containing[cell])
+        var_constraints = [[] for _ in variables]
+        need, free = [], []
+        for c, sentence in enumerate(sentences.values()):
+            cells = sentence.cells
+            need.append(sentence.count)
+            free.append(len(cells))
+            for cell in cells:
+                var_constraints[index[cell]].append(c)
+
+        totals, counts = dict(), dict()
+
+        def record(assignment):
+            k = sum(assignment)
+            totals[k] = totals.get(k, 0) + 1
+            row = counts.setdefault(k, [0] * len(variables))
+            for i, value in enumerate(assignment):
+                row[i] += value
+
+        # Enumerate every configuration, or sample some if too many
+        if not search(var_constraints, need, free, record, ENUMERATION_LIMIT):
+            totals.clear()
+            counts.clear()
+            for _ in range(SAMPLES):
+                search(var_constraints, need, free, record,
+                       ENUMERATION_LIMIT // SAMPLES, rng=random)
+        return variables, totals, counts
 
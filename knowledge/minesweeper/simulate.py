@@ -0,0 +1,119 @@
+import argparse
+import multiprocessing
+import random
+import time
+
+from minesweeper import (
+    ArrayMinesweeper, Minesweeper, MinesweeperAI, write_trace
+)
+
+
+BOARDS = {
+    "list": Minesweeper,
+    "array": ArrayMinesweeper,
+}
+
+
+def play(height, width, mines, guess, solver, board, trace, seed):
+    """
+    Plays one seeded game without a display. On an "array" board,
+    revealing a cell with no nearby mines also reveals its neighbors.
+    Returns a tuple (won, moves, inference time, total time, trace).
+    """
+    random.seed(seed)
+    start = time.perf_counter()
+    game = BOARDS[board](height=height, width=width, mines=mines)
+    ai = MinesweeperAI(height=height, width=width, mines=mines, guess=guess,
+                       solver=solver, trace=trace)
+    safe_cells = height * width - mines
+    inference = 0
+    moves = 0
+
+    while len(ai.moves_made) < safe_cells:
+        move = ai.make_safe_move()
+        if move is None:
+            move = ai.make_random_move()
+            if move is None:
+                break
+        moves += 1
+        if game.is_mine(move):
+            break
+        if board == "array":
+            revealed = game.reveal(move)
+        else:
+            revealed = {move: game.nearby_mines(move)}
+        before = time.perf_counter()
+        for cell, nearby in revealed.items():
+            ai.add_knowledge(cell, nearby)
+        inference += time.perf_counter() - before
+
+    won = len(ai.moves_made) == safe_cells
+    records = [{"game": seed, **record} for record in ai.trace or []]
+    return won, moves, inference, time.perf_counter() - start, records
+
+
+def play_seed(arguments):
+    """Unpacks the arguments of `play` for use with a process pool."""
+    return play(*arguments)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Play many Minesweeper games with the AI, headless."
+    )
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--height", type=int, default=8)
+    parser.add_argument("--width", type=int, default=8)
+    parser.add_argument("--mines", type=int,
+                        help="number of mines (default: from --density)")
+    parser.add_argument("--density", type=float, default=0.125,
+                        help="fraction of cells that are mines")
+    parser.add_argument("--guess", choices=["random", "probability"],
+                        default="random")
+    parser.add_argument("--solver", choices=["subset", "linear"],
+                        default="subset")
+    parser.add_argument("--board", choices=list(BOARDS), default="list")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="seed of the first game; game i uses seed + i")
+    parser.add_argument("--trace",
+                        help="write every add_knowledge call to this file "
+                             "(.json for JSON, otherwise CSV)")
+    parser.add_argument("--processes", type=int,
+                        help="worker processes (default: one per core)")
+    args = parser.parse_args()
+
+    mines = args.mines
+    if mines is None:
+        mines = round(args.height * args.width * args.density)
+    games = [
+        (args.height, args.width, mines, args.guess, args.solver, args.board,
+         args.trace is not None, args.seed + i)
+        for i in range(args.games)
+    ]
+
+    start = time.perf_counter()
+    with multiprocessing.Pool(args.processes) as pool:
+        results = list(pool.imap_unordered(play_seed, games, chunksize=16))
+    elapsed = time.perf_counter() - start
+
+    wins = sum(result[0] for result in results)
+    moves = sum(result[1] for result in results)
+    inference = sum(result[2] for result in results)
+    playing = sum(result[3] for result in results)
+    print(f"Games: {len(results)} on {args.height}x{args.width} "
+          f"with {mines} mines ({args.solver} solver, {args.guess} guesses)")
+    print(f"Win rate: {wins / len(results):.2%}")
+    print(f"Moves per second: {moves / playing:.0f} per process, "
+          f"{moves / elapsed:.0f} overall")
+    print(f"Inference time per move: {1000 * inference / moves:.3f} ms")
+    print(f"Wall time: {elapsed:.2f} s")
+
+    if args.trace:
+        write_trace(
+            [record for result in results for record in result[4]],
+            args.trace
+        )
+
+
+if __name__ == "__main__":
+    main()
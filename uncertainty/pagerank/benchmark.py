@@ -0,0 +1,117 @@
+import argparse
+import csv
+import os
+import tempfile
+import time
+import tracemalloc
+
+from graphs import GENERATORS
+from pagerank import *
+
+
+def sample(corpus, samples):
+    """Runs sample_pagerank."""
+    return sample_pagerank(corpus, DAMPING, samples)
+
+
+def surfers(corpus, samples):
+    """Runs surfer_pagerank with one process per CPU."""
+    return surfer_pagerank(corpus, DAMPING, samples,
+                           processes=os.cpu_count() or 1)
+
+
+def iterate(corpus, samples):
+    """Runs iterate_pagerank with its default settings."""
+    return iterate_pagerank(corpus, DAMPING)
+
+
+def gauss_seidel(corpus, samples):
+    """Runs iterate_pagerank with Gauss-Seidel updates and quadratic
+    extrapolation."""
+    return iterate_pagerank(corpus, DAMPING, method="gauss-seidel",
+                            extrapolation="quadratic")
+
+
+def stream(corpus, samples):
+    """Writes an edge list to a temporary file and runs stream_pagerank."""
+    graph = link_graph(corpus)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "edges")
+        save_edges(path, graph.pages, graph_edges(graph))
+        ranks = stream_pagerank(path, DAMPING).ranks
+    return dict(zip(graph.pages, ranks))
+
+
+ENGINES = {
+    "sample": sample,
+    "surfers": surfers,
+    "iterate": iterate,
+    "gauss-seidel": gauss_seidel,
+    "stream": stream,
+}
+
+
+def reference(corpus):
+    """Returns PageRank values computed to a much tighter tolerance."""
+    return iterate_pagerank(corpus, DAMPING, tolerance=1e-12,
+                            max_iterations=10000)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare PageRank engines on synthetic link graphs."
+    )
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=[100, 1000, 10000],
+                        help="numbers of pages to generate graphs for")
+    parser.add_argument("--graphs", nargs="+", choices=list(GENERATORS),
+                        default=list(GENERATORS))
+    parser.add_argument("--engines", nargs="+", choices=list(ENGINES),
+                        default=list(ENGINES))
+    parser.add_argument("--samples", type=int, default=SAMPLES,
+                        help="samples for the sampling engines")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--csv", help="also write results to this CSV file")
+    args = parser.parse_args()
+
+    results = []
+    for kind in args.graphs:
+        for size in args.sizes:
+            corpus = GENERATORS[kind](size, seed=args.seed + size)
+            expected = reference(corpus)
+            for engine in args.engines:
+                start = time.perf_counter()
+                ranks = ENGINES[engine](corpus, args.samples)
+                elapsed = time.perf_counter() - start
+
+                # Measure memory in a second run, since tracing slows
+                # down the first. Only this process is traced.
+                tracemalloc.start()
+                ENGINES[engine](corpus, args.samples)
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+
+                error = sum(abs(ranks[page] - expected[page])
+                            for page in corpus)
+                results.append({
+                    "graph": kind,
+                    "pages": size,
+                    "links": sum(map(len, corpus.values())),
+                    "engine": engine,
+                    "seconds": elapsed,
+                    "peak bytes": peak,
+                    "l1 error": error,
+                })
+                print(f"{kind:<14}{size:>8} pages  {engine:<14}"
+                      f"{elapsed:10.4f} s  {peak / 2 ** 20:9.2f} MiB  "
+                      f"{error:12.3e} L1")
+
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(results[0]))
+            writer.writeheader()
+            writer.writerows(results)
+
+
+if __name__ == "__main__":
+    main()
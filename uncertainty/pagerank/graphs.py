@@ -0,0 +1,126 @@
+import math
+import os
+import random
+import sys
+
+
+def page_names(n):
+    """Returns names for `n` pages: 0.html, 1.html, ..."""
+    return [f"{i}.html" for i in range(n)]
+
+
+def erdos_renyi(n, p=None, seed=None):
+    """
+    Generates a random corpus of `n` pages where each page links to each
+    other page independently with probability `p` (by default about
+    four links per page).
+
+    Returns a dictionary in the format of `crawl`, mapping each page to
+    the set of pages it links to.
+    """
+    rng = random.Random(seed)
+    names = page_names(n)
+    if p is None:
+        p = min(1, 4 / max(1, n - 1))
+    corpus = {name: set() for name in names}
+    if p <= 0 or n < 2:
+        return corpus
+
+    # Skip over the pairs without a link, choosing the gap to the next
+    # link at random, instead of trying every pair of pages
+    for i, name in enumerate(names):
+        links = corpus[name]
+        j = -1
+        while True:
+            if p < 1:
+                j += 1 + int(math.log(1 - rng.random()) / math.log(1 - p))
+            else:
+                j += 1
+            if j >= n - 1:
+                break
+            links.add(names[j if j < i else j + 1])
+    return corpus
+
+
+def preferential_attachment(n, links=3, seed=None):
+    """
+    Generates a random corpus of `n` pages in which each new page links
+    to `links` earlier pages, chosen with probability proportional to
+    one more than the number of links they already receive. This gives
+    a few very popular pages, with a power-law distribution of incoming
+    links.
+
+    Returns a dictionary in the format of `crawl`.
+    """
+    rng = random.Random(seed)
+    names = page_names(n)
+    corpus = {name: set() for name in names}
+
+    # Every page appears once, plus once for each link it receives, so
+    # choosing uniformly from `targets` chooses by popularity
+    targets = []
+    for i, name in enumerate(names):
+        chosen = set()
+        while len(chosen) < min(links, i):
+            chosen.add(targets[int(rng.random() * len(targets))])
+        corpus[name] = set(names[j] for j in chosen)
+        targets.extend(chosen)
+        targets.append(i)
+    return corpus
+
+
+def dangling(n, fraction=0.5, links=3, seed=None):
+    """
+    Generates a random corpus of `n` pages in which about `fraction` of
+    the pages have no links, and every other page links to `links`
+    pages chosen at random.
+
+    Returns a dictionary in the format of `crawl`.
+    """
+    rng = random.Random(seed)
+    names = page_names(n)
+    corpus = dict()
+    for name in names:
+        if rng.random() < fraction or n < 2:
+            corpus[name] = set()
+            continue
+        chosen = rng.sample(names, min(links + 1, n))
+        corpus[name] = set(
+            [link for link in chosen if link != name][:links]
+        )
+    return corpus
+
+
+GENERATORS = {
+    "erdos-renyi": erdos_renyi,
+    "preferential": preferential_attachment,
+    "dangling": dangling,
+}
+
+
+def write_corpus(corpus, directory):
+    """
+    Writes `corpus` to `directory` as one HTML page per page, so that it
+    can be crawled by pagerank.py.
+    """
+    os.makedirs(directory, exist_ok=True)
+    for page, links in corpus.items():
+        with open(os.path.join(directory, page), "w") as f:
+            f.write(f"<!DOCTYPE html>\n<html>\n<head>\n"
+                    f"<title>{page}</title>\n</head>\n<body>\n")
+            for link in sorted(links):
+                f.write(f'<a href="{link}">{link}</a>\n')
+            f.write("</body>\n</html>\n")
+
+
+def main():
+    if len(sys.argv) not in [4, 5] or sys.argv[1] not in GENERATORS:
+        sys.exit("Usage: python graphs.py "
+                 f"{'|'.join(GENERATORS)} pages directory [seed]")
+    seed = int(sys.argv[4]) if len(sys.argv) == 5 else None
+    corpus = GENERATORS[sys.argv[1]](int(sys.argv[2]), seed=seed)
+    write_corpus(corpus, sys.argv[3])
+
+
+if __name__ == "__main__":
+    main()
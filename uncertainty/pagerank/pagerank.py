@@ -1,16 +1,59 @@
+import json
+import math
+import mmap
+import multiprocessing
 import os
+import posixpath
 import random
 import re
+import struct
 import sys
 
+from array import array
+from bisect import bisect_left
+from collections import Counter, deque, namedtuple
+from functools import partial
+from html.parser import HTMLParser
+from itertools import accumulate
+from operator import add, mul, sub, truediv
+from urllib.parse import urlsplit
+
 DAMPING = 0.85
 SAMPLES = 10000
 
+CACHE = ".pagerank-cache"
+CACHE_VERSION = 1
+
+# Iterations between extrapolation steps in power_iteration
+EXTRAPOLATION_PERIOD = 10
+
+# Edge list files start with a magic string and the number of pages
+EDGE_HEADER = struct.Struct("=8sQ")
+EDGE_MAGIC = b"PREDGES1"
+EDGE_CHUNK = 1 << 16
+
+LinkGraph = namedtuple("LinkGraph", ["pages", "indptr", "indices"])
+Iteration = namedtuple("Iteration", ["ranks", "iterations", "residuals"])
+
 
 def main():
-    if len(sys.argv) != 2:
-        sys.exit("Usage: python pagerank.py corpus")
-    corpus = crawl(sys.argv[1])
+    if len(sys.argv) not in [2, 3]:
+        sys.exit("Usage: python pagerank.py corpus [edges]\n"
+                 "       python pagerank.py edges")
+
+    # Large corpora can be written to an edge list and streamed from disk
+    if len(sys.argv) == 3:
+        crawl_edges(sys.argv[1], sys.argv[2])
+    if len(sys.argv) == 3 or os.path.isfile(sys.argv[1]):
+        edges = sys.argv[-1]
+        ranks = stream_pagerank(edges, DAMPING).ranks
+        print("PageRank Results from Streaming Iteration")
+        with open(edges + ".pages", encoding="utf-8") as f:
+            for line, rank in zip(f, ranks):
+                page = line.rstrip("\n")
+                print(f"  {page}: {rank:.4f}")
+        return
+    corpus = load_graph(sys.argv[1])
     ranks = sample_pagerank(corpus, DAMPING, SAMPLES)
     print(f"PageRank Results from Sampling (n = {SAMPLES})")
     for page in sorted(ranks):
@@ -48,6 +91,215 @@ def crawl(directory):
     return pages
 
 
+def crawl_graph(directory, processes=None):
+    """
+    Parse every HTML page in `directory` and its subdirectories, using
+    a pool of `processes` workers, and return the links between them
+    as a LinkGraph.
+
+    Pages are named by their path relative to `directory`, with "/"
+    between directories, and links are resolved relative to the page
+    that contains them. Only links to other pages in the corpus are kept.
+    """
+    pages = html_pages(directory)
+    return build_graph(pages, parse_pages(directory, pages, processes))
+
+
+def html_pages(directory):
+    """
+    Return the sorted paths of all HTML pages under `directory`,
+    relative to it and with "/" between directories, skipping hidden
+    directories.
+    """
+    pages = []
+    for root, directories, filenames in os.walk(directory):
+        directories[:] = sorted(
+            name for name in directories if not name.startswith(".")
+        )
+        for filename in filenames:
+            if filename.endswith(".html"):
+                path = os.path.relpath(os.path.join(root, filename), directory)
+                pages.append(path.replace(os.sep, "/"))
+    return sorted(pages)
+
+
+def parse_pages(directory, pages, processes=None):
+    """
+    Return the set of links of each of `pages`, parsing files in
+    parallel, in chunks so that each task is worth sending to a worker.
+    """
+    parse = partial(page_links, directory)
+    if processes == 1 or len(pages) < 2:
+        return list(map(parse, pages))
+    with multiprocessing.Pool(processes) as pool:
+        workers = processes or os.cpu_count() or 1
+        chunksize = max(1, len(pages) // (4 * workers))
+        return pool.map(parse, pages, chunksize)
+
+
+def build_graph(pages, links):
+    """
+    Return the LinkGraph of `pages` given the set of links of each page,
+    keeping only links to other pages in the corpus.
+    """
+    ids = {page: i for i, page in enumerate(pages)}
+    indptr = array("l", [0])
+    indices = array("l")
+    for i, targets in enumerate(links):
+        indices.extend(sorted(
+            set(ids[target] for target in targets if target in ids) - {i}
+        ))
+        indptr.append(len(indices))
+    return LinkGraph(pages, indptr, indices)
+
+
+def load_graph(directory, cache=None, processes=None):
+    """
+    Return the LinkGraph of the HTML pages under `directory`, like
+    `crawl_graph`, reusing the links of unchanged pages from an on-disk
+    cache and updating the cache for pages that were added or changed.
+
+    The cache lives in `cache` (by default a .pagerank-cache directory
+    inside `directory`), as an index of link names and per-file
+    modification times and sizes, and a binary file of link ids that is
+    memory-mapped when loading.
+    """
+    if cache is None:
+        cache = os.path.join(directory, CACHE)
+    index_path = os.path.join(cache, "index.json")
+    links_path = os.path.join(cache, "links.bin")
+
+    # Read the cache, if there is a usable one
+    try:
+        with open(index_path) as f:
+            index = json.load(f)
+        if not isinstance(index, dict):
+            raise ValueError("cache index is not an object")
+        if index.get("version") != CACHE_VERSION:
+            raise ValueError("unknown cache version")
+        with open(links_path, "rb") as f:
+            if os.fstat(f.fileno()).st_size:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                    with memoryview(m) as data:
+                        cached = cached_links(index, data)
+            else:
+                cached = cached_links(index, memoryview(b""))
+    except (OSError, ValueError, KeyError, TypeError, IndexError):
+        cached = dict()
+
+    # Only parse pages that are new or whose file has changed
+    pages = html_pages(directory)
+    stamps = dict()
+    for page in pages:
+        info = os.stat(os.path.join(directory, *page.split("/")))
+        stamps[page] = [info.st_mtime_ns, info.st_size]
+    changed = [
+        page for page in pages
+        if page not in cached or cached[page][0] != stamps[page]
+    ]
+    parsed = dict(zip(changed, parse_pages(directory, changed, processes)))
+    links = [
+        parsed[page] if page in parsed else cached[page][1]
+        for page in pages
+    ]
+
+    # A cache that cannot be written is skipped, as for read-only corpora
+    if changed or len(cached) != len(pages):
+        try:
+            save_links(cache, pages, stamps, links)
+        except OSError:
+            pass
+    return build_graph(pages, links)
+
+
+def cached_links(index, data):
+    """
+    Return a dictionary from each page in a cache index to a pair of its
+    file's [modification time, size] and its set of links, where `data`
+    holds the cache's binary link ids.
+
+    Raise ValueError if the index is malformed or the link ids do not
+    fit it, as when the binary file was cut short.
+    """
+    names = index["names"]
+    if not isinstance(names, list) or not isinstance(index["files"], dict):
+        raise ValueError("malformed cache index")
+    with data.cast("q") as ids:
+        if ids and not 0 <= min(ids) <= max(ids) < len(names):
+            raise ValueError("link id out of range")
+        links = dict()
+        for page, (stamp, start, end) in index["files"].items():
+            if not 0 <= start <= end <= len(ids):
+                raise ValueError("link range out of bounds")
+            links[page] = (stamp, set(names[k] for k in ids[start:end]))
+        return links
+
+
+def save_links(cache, pages, stamps, links):
+    """
+    Write the links of each page to the cache directory `cache`,
+    replacing any previous cache files.
+    """
+    os.makedirs(cache, exist_ok=True)
+    names = dict()
+    ids = array("q")
+    files = dict()
+    for page, targets in zip(pages, links):
+        start = len(ids)
+        ids.extend(names.setdefault(target, len(names)) for target in targets)
+        files[page] = [stamps[page], start, len(ids)]
+
+    # Write to temporary files, then move them into place
+    links_path = os.path.join(cache, "links.bin")
+    with open(links_path + ".tmp", "wb") as f:
+        ids.tofile(f)
+    index_path = os.path.join(cache, "index.json")
+    with open(index_path + ".tmp", "w") as f:
+        json.dump(
+            {"version": CACHE_VERSION, "names": list(names), "files": files}, f
+        )
+    os.replace(links_path + ".tmp", links_path)
+    os.replace(index_path + ".tmp", index_path)
+
+
+class LinkParser(HTMLParser):
+    """
+    HTML parser that collects the href of every link it is fed.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.links = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "a":
+            for name, value in attrs:
+                if name == "href" and value:
+                    self.links.append(value)
+
+
+def page_links(directory, page):
+    """
+    Return the set of pages linked to by `page`, a path relative to
+    `directory`, reading the file in chunks rather than all at once.
+    """
+    parser = LinkParser()
+    with open(os.path.join(directory, *page.split("/"))) as f:
+        for chunk in iter(partial(f.read, 1 << 16), ""):
+            parser.feed(chunk)
+    parser.close()
+
+    # Resolve relative links, ignoring links to other sites
+    links = set()
+    folder = posixpath.dirname(page)
+    for link in parser.links:
+        parts = urlsplit(link)
+        if parts.scheme or parts.netloc or not parts.path:
+            continue
+        links.add(posixpath.normpath(posixpath.join(folder, parts.path)))
+    return links
+
+
 def transition_model(corpus, page, damping_factor):
     """
     Return a probability distribution over which page to visit next,
@@ -84,75 +336,691 @@ def sample_pagerank(corpus, damping_factor, n):
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
     """
+    graph = as_graph(corpus)
+    pages = len(graph.pages)
 
-    # start PR dictionary with the keys, and count to 0
-    page_rank = dict()
+    # Look up each page's links once, instead of building its
+    # transition model at every step
+    links = out_links(graph)
+    counts = [0] * pages
+    rand = random.random
 
-    for key in corpus:
-        page_rank[key] = 0
+    # Choose first page randomly and count it as the first sample
+    page = random.randrange(pages)
+    counts[page] += 1
 
-    # get all pages
-    keys = list(corpus.keys())
+    # With probability `damping_factor` follow one of the page's links,
+    # otherwise (or if it has none) jump to any page
+    for _ in range(n - 1):
+        outgoing = links[page]
+        if outgoing and rand() < damping_factor:
+            page = outgoing[int(rand() * len(outgoing))]
+        else:
+            page = int(rand() * pages)
+        counts[page] += 1
 
-    # choose first page randomly and add it to the PR count
-    random_key = random.choices(list(keys))[0]
-    page_rank[random_key] += 1
+    # Divide by n to get probability of each page
+    return {graph.pages[i]: counts[i] / n for i in range(pages)}
 
-    # iterate n times
-    for _ in range(0, n):
 
-        # empty weights
-        weights = []
+def surfer_pagerank(corpus, damping_factor, n, walkers=1000, processes=1,
+                    seed=None):
+    """
+    Return PageRank values for each page estimated from about `n` samples
+    taken by many independent random surfers, all moved one step at a
+    time. The surfers are split between `processes` worker processes,
+    each with its own random seed derived from `seed`.
 
-        # get transition model of current page
-        transition_mod = transition_model(corpus, random_key, damping_factor)
+    Return a dictionary where keys are page names, and values are
+    their estimated PageRank value. All PageRank values sum to 1.
+    """
+    graph = as_graph(corpus)
+    links = out_links(graph)
+    # Take enough steps to reach n samples, with only as many surfers as
+    # that needs, so walkers * steps is within one step of n
+    walkers = max(1, min(walkers, n))
+    steps = -(-n // walkers)
+    walkers = -(-n // steps)
 
-        # get weights for each of possible link
-        for key in transition_mod:
-            weights.append(transition_mod[key])
+    # Give each process a share of the surfers and its own seed
+    rng = random.Random(seed)
+    processes = max(1, min(processes, walkers))
+    shards = [
+        (links, damping_factor, walkers // processes
+         + (i < walkers % processes), steps, rng.getrandbits(64))
+        for i in range(processes)
+    ]
+    if processes == 1:
+        results = [surf(*shards[0])]
+    else:
+        with multiprocessing.Pool(processes) as pool:
+            results = pool.starmap(surf, shards)
 
-        # select random page, taking into count the probability of each link
-        random_key = random.choices(list(transition_mod.keys()), weights=weights, k=1)[0]
+    # Merge the visit counts of every process
+    counts = Counter()
+    for result in results:
+        counts.update(result)
+    total = sum(counts.values())
+    return {page: counts[i] / total for i, page in enumerate(graph.pages)}
 
-        # add it to the PR count
-        page_rank[random_key] += 1
 
-    # divide by n to get probability of each page
-    for key in page_rank:
-        page_rank[key] /= n
+def surf(links, damping_factor, walkers, steps, seed):
+    """
+    Move `walkers` random surfers `steps` times over pages whose links
+    are given by `links`, starting at random pages.
+    Return a Counter of how many times each page id was visited.
+    """
+    rand = random.Random(seed).random
+    pages = len(links)
+    positions = [int(rand() * pages) for _ in range(walkers)]
+    counts = Counter(positions)
+    for _ in range(steps - 1):
+        positions = [
+            outgoing[int(rand() * len(outgoing))]
+            if outgoing and rand() < damping_factor
+            else int(rand() * pages)
+            for outgoing in map(links.__getitem__, positions)
+        ]
+        counts.update(positions)
+    return counts
 
-    return page_rank
 
+def iterate_pagerank(corpus, damping_factor, tolerance=0.001,
+                     max_iterations=1000, method="jacobi", extrapolation=None,
+                     stats=None):
+    """
+    Return PageRank values for each page by iteratively updating
+    PageRank values until convergence.
 
-def iterate_pagerank(corpus, damping_factor):
-    threshold=0.001
-    N = len(corpus)
-    page_rank = {page: 1 / N for page in corpus}
+    Return a dictionary where keys are page names, and values are
+    their estimated PageRank value (a value between 0 and 1). All
+    PageRank values should sum to 1.
 
-    for page in corpus:
-        if not corpus[page]: 
-            corpus[page] = set(corpus.keys())
+    Iteration stops once an update changes the values by less than
+    `tolerance` in total, or after `max_iterations` updates. See
+    `power_iteration` for `method` and `extrapolation`. If `stats` is a
+    dictionary, the number of iterations and the list of changes made
+    by each update are stored in it as "iterations" and "residuals".
+    """
+    graph = as_graph(corpus)
+    result = power_iteration(
+        graph, damping_factor, tolerance, max_iterations,
+        method, extrapolation
+    )
+    if stats is not None:
+        stats["iterations"] = result.iterations
+        stats["residuals"] = result.residuals
+    return dict(zip(graph.pages, result.ranks))
 
-    while True:
-        new_rank = {}
-        for page in corpus:
-            rank = (1 - damping_factor) / N
 
-            for other_page in corpus:
-                if page in corpus[other_page]:
-                    rank += damping_factor * page_rank[other_page] / len(corpus[other_page])
+def link_graph(corpus):
+    """
+    Return the links of `corpus` as a LinkGraph with integer page ids.
+
+    `pages` lists the page names in sorted order, and the ids of the
+    pages linked to by page `i` are `indices[indptr[i]:indptr[i + 1]]`,
+    as in a compressed sparse row (CSR) matrix.
+    """
+    pages = sorted(corpus)
+    ids = {page: i for i, page in enumerate(pages)}
+    indptr = array("l", [0])
+    indices = array("l")
+    for page in pages:
+        indices.extend(sorted(ids[link] for link in corpus[page]))
+        indptr.append(len(indices))
+    return LinkGraph(pages, indptr, indices)
+
+
+def as_graph(corpus):
+    """
+    Return `corpus` as a LinkGraph, building one if it is a dictionary.
+    """
+    if isinstance(corpus, LinkGraph):
+        return corpus
+    return link_graph(corpus)
+
+
+def transpose(graph):
+    """
+    Return the incoming links of each page of `graph`, as a pair of
+    (indptr, indices) arrays in the same layout as a LinkGraph.
+    """
+    n = len(graph.pages)
+    counts = [0] * (n + 1)
+    for target in graph.indices:
+        counts[target + 1] += 1
+    indptr = array("l", accumulate(counts))
+    indices = array("l", bytes(len(graph.indices) * indptr.itemsize))
+    position = list(indptr[:-1])
+    for source in range(n):
+        start, end = graph.indptr[source], graph.indptr[source + 1]
+        for target in graph.indices[start:end]:
+            indices[position[target]] = source
+            position[target] += 1
+    return indptr, indices
+
+
+def out_degrees(graph):
+    """
+    Return the number of links of each page of `graph`, and the ids of
+    the pages with no links.
+
+    Pages with no links get an infinite degree, so they pass on nothing
+    through links and their rank is spread evenly instead.
+    """
+    n = len(graph.pages)
+    degrees = [
+        (graph.indptr[i + 1] - graph.indptr[i]) or math.inf for i in range(n)
+    ]
+    dangling = [i for i in range(n) if degrees[i] == math.inf]
+    return degrees, dangling
+
+
+def out_links(graph):
+    """
+    Return the ids of the pages linked to by each page of `graph`, as a
+    list of tuples.
+    """
+    return [
+        tuple(graph.indices[graph.indptr[i]:graph.indptr[i + 1]])
+        for i in range(len(graph.pages))
+    ]
+
 
-            new_rank[page] = rank
+def power_iteration(graph, damping_factor, tolerance=0.001,
+                    max_iterations=1000, method="jacobi", extrapolation=None,
+                    ranks=None):
+    """
+    Compute the PageRank values of the pages of `graph`, repeating the
+    PageRank update until it changes the values by less than `tolerance`
+    in total (L1 distance), or `max_iterations` times. Starts from
+    `ranks` if given, otherwise from equal values for every page.
+
+    `method` is "jacobi" to compute each update from the previous values
+    only, or "gauss-seidel" to use values already updated in the same
+    pass. `extrapolation` may be "quadratic" to jump ahead using the
+    last few updates every EXTRAPOLATION_PERIOD iterations.
+
+    Return an Iteration with the list of values indexed by page id,
+    the number of iterations, and the L1 change made by each one.
+    """
+    if method == "jacobi":
+        update = pagerank_update(graph, damping_factor)
+    elif method == "gauss-seidel":
+        update = gauss_seidel_update(graph, damping_factor)
+    else:
+        raise ValueError(f"unknown method {method!r}")
+    if extrapolation not in (None, "quadratic"):
+        raise ValueError(f"unknown extrapolation {extrapolation!r}")
+
+    n = len(graph.pages)
+    ranks = [1 / n] * n if ranks is None else list(ranks)
+    history = [ranks]
+    residuals = []
+    while len(residuals) < max_iterations:
+        new_ranks = update(ranks)
+        if method == "gauss-seidel":
+
+            # A sweep does not keep the total at 1, and the error in the
+            # total would otherwise only shrink by the damping factor
+            total = sum(new_ranks)
+            new_ranks = [rank / total for rank in new_ranks]
+        residuals.append(sum(map(abs, map(sub, new_ranks, ranks))))
+        ranks = new_ranks
+        if residuals[-1] < tolerance:
+            break
+
+        # Keep the last few values to extrapolate from
+        history = history[-3:] + [ranks]
+        if extrapolation and len(residuals) % EXTRAPOLATION_PERIOD == 0:
+            ranks = extrapolate(history)
+            history = [ranks]
+
+    total = sum(ranks)
+    return Iteration(
+        [rank / total for rank in ranks], len(residuals), residuals
+    )
+
+
+def extrapolate(history):
+    """
+    Return an estimate of the limit of a sequence of PageRank values
+    from the last 4 terms in `history`, using quadratic extrapolation.
+    """
+    if len(history) >= 4:
+        x0, x1, x2, x3 = history[-4:]
+        y1 = list(map(sub, x1, x0))
+        y2 = list(map(sub, x2, x0))
+        y3 = list(map(sub, x3, x0))
+
+        # Least squares fit of y3 = -(g1 * y1 + g2 * y2)
+        a11 = sum(map(mul, y1, y1))
+        a12 = sum(map(mul, y1, y2))
+        a22 = sum(map(mul, y2, y2))
+        b1 = -sum(map(mul, y1, y3))
+        b2 = -sum(map(mul, y2, y3))
+        determinant = a11 * a22 - a12 * a12
+        if not determinant:
+            return x3
+        g1 = (b1 * a22 - b2 * a12) / determinant
+        g2 = (a11 * b2 - a12 * b1) / determinant
+
+        # Coefficients of the last three terms in the extrapolated value
+        beta0, beta1, beta2 = g1 + g2 + 1, g2 + 1, 1
+        estimate = [
+            beta0 * a + beta1 * b + beta2 * c for a, b, c in zip(x1, x2, x3)
+        ]
+        if min(estimate) <= 0:
+            return x3
+        total = sum(estimate)
+        return [value / total for value in estimate]
+
+    return history[-1]
+
+
+def pagerank_update(graph, damping_factor):
+    """
+    Return a function that applies one PageRank update to a list of
+    values indexed by the page ids of `graph`.
+
+    A page with no links is treated as having one link to every page
+    (including itself), so its rank is spread evenly over the corpus.
+    """
+    n = len(graph.pages)
+    in_indptr, in_indices = transpose(graph)
+    degrees, dangling = out_degrees(graph)
+
+    def update(ranks):
+        shares = list(map(truediv, ranks, degrees))
+        base = (1 - damping_factor) / n + damping_factor * sum(
+            ranks[i] for i in dangling
+        ) / n
+        return [
+            base + damping_factor * sum(map(
+                shares.__getitem__, in_indices[in_indptr[i]:in_indptr[i + 1]]
+            ))
+            for i in range(n)
+        ]
 
-        if all(abs(new_rank[page] - page_rank[page]) < threshold for page in page_rank):
+    return update
+
+
+def gauss_seidel_update(graph, damping_factor):
+    """
+    Return a function that applies one Gauss-Seidel PageRank update to
+    a list of values indexed by the page ids of `graph`, updating pages
+    in order and using each new value as soon as it is computed.
+    """
+    n = len(graph.pages)
+    in_indptr, in_indices = transpose(graph)
+    degrees, dangling = out_degrees(graph)
+
+    def update(ranks):
+        ranks = list(ranks)
+        shares = list(map(truediv, ranks, degrees))
+        lost = sum(ranks[i] for i in dangling)
+        for i in range(n):
+            rank = (1 - damping_factor) / n + damping_factor * (
+                lost / n + sum(map(
+                    shares.__getitem__,
+                    in_indices[in_indptr[i]:in_indptr[i + 1]]
+                ))
+            )
+            if degrees[i] == math.inf:
+                lost += rank - ranks[i]
+            else:
+                shares[i] = rank / degrees[i]
+            ranks[i] = rank
+        return ranks
+
+    return update
+
+
+def personalized_pagerank(corpus, damping_factor, teleports,
+                          tolerance=0.001, max_iterations=1000):
+    """
+    Return personalized PageRank values for each teleport distribution
+    in `teleports`, as a list of dictionaries like `iterate_pagerank`.
+
+    Each distribution is a dictionary mapping pages to weights, or a
+    collection of seed pages weighted equally. Instead of choosing any
+    page at random, the surfer jumps to a page chosen by these weights,
+    including when leaving a page with no links.
+
+    All distributions are iterated together, so each update walks the
+    links once for all of them, until no values change by more than
+    `tolerance` in total or after `max_iterations` updates.
+    """
+    graph = as_graph(corpus)
+    n, k = len(graph.pages), len(teleports)
+    ids = {page: i for i, page in enumerate(graph.pages)}
+
+    # Row i holds the teleport weight of page i in each distribution
+    jumps = [[0] * k for _ in range(n)]
+    for column, teleport in enumerate(teleports):
+        if isinstance(teleport, str):
+            teleport = [teleport]
+        if not isinstance(teleport, dict):
+            teleport = dict.fromkeys(teleport, 1)
+        total = sum(teleport.values())
+        if total <= 0:
+            raise ValueError(f"teleport distribution {column} has no weight")
+        for page, weight in teleport.items():
+            if page not in ids:
+                raise ValueError(f"unknown page {page!r}")
+            jumps[ids[page]][column] += weight / total
+    jumpers = [i for i in range(n) if any(jumps[i])]
+
+    in_indptr, in_indices = transpose(graph)
+    degrees, dangling = out_degrees(graph)
+
+    ranks = [list(row) for row in jumps]
+    for _ in range(max_iterations):
+        shares = [
+            [value / degree for value in row]
+            for row, degree in zip(ranks, degrees)
+        ]
+
+        # Rank left on pages with no links teleports like the rest
+        lost = [0] * k
+        for i in dangling:
+            lost = list(map(add, lost, ranks[i]))
+        weights = [1 - damping_factor + damping_factor * x for x in lost]
+
+        new_ranks = []
+        for i in range(n):
+            incoming = in_indices[in_indptr[i]:in_indptr[i + 1]]
+            new_ranks.append([
+                damping_factor * sum(column)
+                for column in zip(*map(shares.__getitem__, incoming))
+            ] if incoming else [0] * k)
+        for i in jumpers:
+            new_ranks[i] = [
+                value + weight * jump
+                for value, weight, jump in zip(new_ranks[i], weights, jumps[i])
+            ]
+
+        residuals = [0] * k
+        for new_row, row in zip(new_ranks, ranks):
+            residuals = list(map(add, residuals, map(abs, map(
+                sub, new_row, row
+            ))))
+        ranks = new_ranks
+        if max(residuals, default=0) < tolerance:
             break
 
-        page_rank = new_rank
+    totals = [sum(column) for column in zip(*ranks)]
+    return [
+        {page: row[column] / totals[column]
+         for page, row in zip(graph.pages, ranks)}
+        for column in range(k)
+    ]
+
+
+def update_pagerank(corpus, ranks, changes, damping_factor,
+                    tolerance=0.001, method="push"):
+    """
+    Return PageRank values for `corpus` after applying `changes`, given
+    `ranks`, the PageRank values of `corpus` before the changes.
+
+    `changes` maps each new page, and each page whose links changed, to
+    its new set of links; links to pages outside the corpus are ignored.
+    `corpus` itself is not modified.
+
+    With method "push", only pages whose incoming links changed start
+    out with an error, which is pushed from page to page along links,
+    only where it is larger than allowed, until the total error is below
+    `tolerance` as in `power_iteration`. This assumes `ranks` are the
+    PageRank values of `corpus`. With method "power", power iteration is
+    started from the old values instead.
+    """
+    pages = set(corpus).union(changes)
+    changes = {
+        page: set(link for link in links if link in pages) - {page}
+        for page, links in changes.items()
+    }
+    links = {**corpus, **changes}
+    n = len(links)
+
+    # Old values are scaled for the new number of pages, which keeps them
+    # a solution for unchanged parts of the corpus, and new pages start
+    # with the least rank a page can have
+    scale = len(ranks) / n
+    least = (1 - damping_factor) / n
+    values = {
+        page: ranks[page] * scale if page in ranks else least
+        for page in links
+    }
+    if method == "power":
+        graph = link_graph(links)
+        start = [values[page] for page in graph.pages]
+        result = power_iteration(graph, damping_factor, tolerance, ranks=start)
+        return dict(zip(graph.pages, result.ranks))
+    elif method != "push":
+        raise ValueError(f"unknown method {method!r}")
+
+    # The residual is how far each value is from satisfying the PageRank
+    # equation. Old values satisfied it, so only the pages that changed
+    # pages link to, or used to link to, have a residual of their own,
+    # along with new pages. Rank spread evenly from pages with no links
+    # changes by the same amount for every page.
+    lost = sum(ranks[page] for page, targets in corpus.items() if not targets)
+    spread = damping_factor * (
+        sum(values[page] for page, targets in links.items() if not targets)
+        - lost
+    ) / n
+    residual = dict()
+    for page, targets in changes.items():
+        if page not in corpus:
+            residual[page] = residual.get(page, 0) + damping_factor * lost / n
+        elif corpus[page]:
+            share = damping_factor * values[page] / len(corpus[page])
+            for target in corpus[page]:
+                residual[target] = residual.get(target, 0) - share
+        if targets:
+            share = damping_factor * values[page] / len(targets)
+            for target in targets:
+                residual[target] = residual.get(target, 0) + share
+
+    # Pushing a page's residual into its value passes a damped share of
+    # it on to the pages it links to, or to every page if it has no
+    # links. Once every residual is below `tolerance` / n, the total is
+    # below `tolerance`.
+    threshold = tolerance / n
+    queue = deque(
+        page for page, amount in residual.items() if abs(amount) >= threshold
+    )
+    queued = set(queue)
+    while True:
+
+        # Residual spread evenly is kept aside until it adds up to enough
+        # to matter, then handed to every page at once
+        if abs(spread) * n >= tolerance or (not queue and spread):
+            for page in links:
+                amount = residual.get(page, 0) + spread
+                residual[page] = amount
+                if page not in queued and abs(amount) >= threshold:
+                    queued.add(page)
+                    queue.append(page)
+            spread = 0
+        if not queue:
+            break
+
+        page = queue.popleft()
+        queued.discard(page)
+        amount = residual.pop(page)
+        values[page] += amount
+        targets = links[page]
+        if not targets:
+            spread += damping_factor * amount / n
+            continue
+        share = damping_factor * amount / len(targets)
+        for target in targets:
+            amount = residual.get(target, 0) + share
+            residual[target] = amount
+            if target not in queued and abs(amount) >= threshold:
+                queued.add(target)
+                queue.append(target)
+
+    total = sum(values.values())
+    return {page: value / total for page, value in values.items()}
+
+
+def save_edges(path, pages, edges):
+    """
+    Write a link graph to `path` as an edge list for `stream_pagerank`,
+    and the names of its pages, one per line, to `path` + ".pages".
+
+    `edges` is an iterable of (source, target) pairs of indices into
+    `pages`, sorted by source. The file holds EDGE_HEADER with the
+    number of pages, then each pair as two native 32-bit unsigned ints.
+    """
+    n = len(pages)
+    if n >= 2 ** 32:
+        raise ValueError("too many pages for an edge list")
+    with open(path + ".pages", "w", encoding="utf-8") as f:
+        for page in pages:
+            f.write(page + "\n")
+    with open(path, "wb") as f:
+        f.write(EDGE_HEADER.pack(EDGE_MAGIC, n))
+        ids = array("I")
+        last = 0
+        for source, target in edges:
+            if not (last <= source < n and 0 <= target < n):
+                raise ValueError(
+                    f"edge ({source}, {target}) is out of order or range"
+                )
+            last = source
+            ids.append(source)
+            ids.append(target)
+            if len(ids) >= 2 * EDGE_CHUNK:
+                ids.tofile(f)
+                del ids[:]
+        ids.tofile(f)
+
+
+def crawl_edges(directory, path, processes=None):
+    """
+    Parse every HTML page under `directory`, like `crawl_graph`, and
+    write the links to the edge list file `path` with `save_edges` as
+    each page is parsed, without building the whole link graph in
+    memory. Link targets are looked up in the sorted list of pages.
+    """
+    pages = html_pages(directory)
+    parse = partial(page_links, directory)
+
+    def edges(links):
+        for source, targets in enumerate(links):
+            ids = set()
+            for target in targets:
+                i = bisect_left(pages, target)
+                if i < len(pages) and pages[i] == target and i != source:
+                    ids.add(i)
+            for target in sorted(ids):
+                yield source, target
+
+    if processes == 1 or len(pages) < 2:
+        save_edges(path, pages, edges(map(parse, pages)))
+        return
+    with multiprocessing.Pool(processes) as pool:
+        workers = processes or os.cpu_count() or 1
+        chunksize = max(1, min(1024, len(pages) // (4 * workers)))
+        save_edges(path, pages, edges(pool.imap(parse, pages, chunksize)))
+
+
+def graph_edges(graph):
+    """
+    Yield the links of `graph` as (source, target) pairs of page ids,
+    sorted by source.
+    """
+    for source in range(len(graph.pages)):
+        start, end = graph.indptr[source], graph.indptr[source + 1]
+        for target in graph.indices[start:end]:
+            yield source, target
+
+
+def edge_pages(path):
+    """
+    Return the number of pages in the edge list file at `path`.
+    """
+    with open(path, "rb") as f:
+        header = f.read(EDGE_HEADER.size)
+    if len(header) < EDGE_HEADER.size:
+        raise ValueError(f"{path} is not an edge list")
+    magic, n = EDGE_HEADER.unpack(header)
+    if magic != EDGE_MAGIC:
+        raise ValueError(f"{path} is not an edge list")
+    return n
+
+
+def read_edges(path, chunk=EDGE_CHUNK):
+    """
+    Yield the edges of the edge list file at `path` through a memory
+    map, `chunk` edges at a time, as arrays of alternating source and
+    target ids.
+    """
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size <= EDGE_HEADER.size:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+            step = 2 * chunk * array("I").itemsize
+            for start in range(EDGE_HEADER.size, size, step):
+                ids = array("I")
+                ids.frombytes(m[start:start + step])
+                yield ids
+
+
+def stream_pagerank(path, damping_factor, tolerance=0.001,
+                    max_iterations=1000, chunk=EDGE_CHUNK):
+    """
+    Compute PageRank values for the graph in the edge list file at
+    `path`, written by `save_edges`, like `power_iteration` but reading
+    the edges from disk `chunk` at a time on every iteration, so only
+    per-page values and link counts are kept in memory.
+
+    Return an Iteration whose values are indexed by page id.
+    """
+    n = edge_pages(path)
+    if not n:
+        return Iteration(array("d"), 0, [])
+
+    # Count links in one pass; pages with no links get an infinite degree
+    # as in pagerank_update
+    degrees = array("d", bytes(8 * n))
+    for ids in read_edges(path, chunk):
+        for source, count in Counter(ids[::2]).items():
+            degrees[source] += count
+    for i in range(n):
+        if not degrees[i]:
+            degrees[i] = math.inf
+
+    ranks = array("d", [1 / n]) * n
+    residuals = []
+    while len(residuals) < max_iterations:
+        shares = array("d", (
+            damping_factor * rank / degree
+            for rank, degree in zip(ranks, degrees)
+        ))
+        lost = sum(
+            rank for rank, degree in zip(ranks, degrees) if degree == math.inf
+        )
+        new_ranks = array("d", [
+            (1 - damping_factor) / n + damping_factor * lost / n
+        ]) * n
+        for ids in read_edges(path, chunk):
+            for source, target in zip(ids[::2], ids[1::2]):
+                new_ranks[target] += shares[source]
+        residuals.append(sum(map(abs, map(sub, new_ranks, ranks))))
+        ranks = new_ranks
+        if residuals[-1] < tolerance:
+            break
 
-    total_rank = sum(page_rank.values())
-    page_rank = {page: rank / total_rank for page, rank in page_rank.items()}
+    total = sum(ranks)
+    return Iteration(
+        array("d", (rank / total for rank in ranks)), len(residuals), residuals
+    )
 
-    return page_rank
 
 if __name__ == "__main__":
     main()